@@ -0,0 +1,52 @@
+'''Compare the memory used by the organised data with plain string columns against the
+dictionary encoded schema used by load_and_organise_data.
+
+Run from the repository root with:
+    python benchmarks/benchmark_categorical.py
+'''
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# In memory files
+import io
+
+# Data analysis tools
+import polars as pl
+
+# Loader functions
+from benchmark_data import load_benchmark_data
+
+def as_strings(frame):
+    '''The frame with every Categorical and Enum column stored as plain strings, as before.'''
+    return frame.with_columns(
+        pl.col(name).cast(pl.String) for name, dtype in frame.schema.items() if isinstance(dtype, (pl.Categorical, pl.Enum))
+    )
+
+def ipc_size(frame):
+    '''Size of the frame written as uncompressed Arrow IPC, as stored in the snapshot.'''
+    buffer = io.BytesIO()
+    frame.write_ipc(buffer, compression='uncompressed')
+    return buffer.tell()
+
+def main():
+    frame_names = ('Tournament data', 'Game data', 'List data', 'Unit data', 'Option data')
+    dataset = load_benchmark_data()
+    frames = dict(zip(frame_names, (dataset.tournament_data, dataset.game_data, dataset.list_data, dataset.unit_data, dataset.option_data)))
+
+    print(f'{"Frame":<16}{"Rows":>10}{"String (MB)":>14}{"Encoded (MB)":>14}{"String IPC (MB)":>18}{"Encoded IPC (MB)":>18}')
+    totals = [0, 0, 0, 0]
+    for name, frame in frames.items():
+        sizes = [
+            as_strings(frame).estimated_size('mb'),
+            frame.estimated_size('mb'),
+            ipc_size(as_strings(frame)) / 1024**2,
+            ipc_size(frame) / 1024**2,
+        ]
+        totals = [total + size for total, size in zip(totals, sizes)]
+        print(f'{name:<16}{frame.height:>10}' + ''.join(f'{size:>{width}.2f}' for size, width in zip(sizes, (14, 14, 18, 18))))
+    print(f'{"Total":<26}' + ''.join(f'{size:>{width}.2f}' for size, width in zip(totals, (14, 14, 18, 18))))
+
+if __name__ == '__main__':
+    main()
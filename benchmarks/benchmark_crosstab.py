@@ -0,0 +1,98 @@
+'''Compare the time taken to count the games of each faction in each month of the "By Date" split of the
+faction popularity page, by filtering the lists once per faction and month as it was first done, by
+grouping the score cube on formatted months, and with the crosstab of monthly bins now used by the page.
+
+Run from the repository root with:
+    python benchmarks/benchmark_crosstab.py [number of repeats]
+'''
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Timing
+import time
+
+# Data analysis tools
+import polars as pl
+import pandas as pd
+import numpy as np
+
+# Dates and times
+from datetime import date
+
+# App functions
+from load_and_organise_data import list_view, score_cube_view
+from faction_popularity import crosstab
+from constants import faction_keys
+from benchmark_data import load_benchmark_data
+
+def cell_counts(list_data, date_range):
+    '''The first path, which filters the lists once for every faction and month.'''
+    counts = []
+    for month in date_range:
+        start = month.date()
+        end = (month + pd.DateOffset(months=1)).date()
+        counts.append([
+            list_data.filter((pl.col('Faction') == fac) & (pl.col('Start Date') >= start) & (pl.col('Start Date') < end)).height
+            for fac in faction_keys
+        ])
+    return np.array(counts, dtype=np.int64).reshape(len(date_range), len(faction_keys))
+
+def month_counts(score_cube, date_range):
+    '''The previous path, which groups the score cube by faction and formatted month and looks each entry up.'''
+    counts = score_cube.with_columns(pl.col('Start Date').dt.strftime('%Y-%m').alias('Month')).group_by('Faction', 'Month').agg(pl.col('Lists').sum())
+    counts = {row[:-1]: row[-1] for row in counts.iter_rows()}
+    return np.array(
+        [[counts.get((fac, month.strftime('%Y-%m')), 0) for fac in faction_keys] for month in date_range],
+        dtype=np.int64
+    ).reshape(len(date_range), len(faction_keys))
+
+def crosstab_counts(score_cube, date_range):
+    '''The path used by the page, which bins the score cube by month and scatters the bins into the counts.'''
+    monthly_counts = (
+        score_cube.lazy()
+        .select('Faction', 'Start Date', 'Lists')
+        .sort('Start Date')
+        .group_by_dynamic('Start Date', every='1mo', group_by='Faction')
+        .agg(pl.col('Lists').sum())
+    )
+    return crosstab(monthly_counts, pl.col('Start Date'), [month.date() for month in date_range], faction_keys, pl.col('Lists'))
+
+def measure_time(count, repeats):
+    '''Time count over the repeats, returning the average time and the counts.'''
+    start = time.perf_counter()
+    for _ in range(repeats):
+        counts = count()
+    return (time.perf_counter() - start) / repeats, counts
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    dataset = load_benchmark_data()
+    end_date = dataset.max_end_date
+
+    print(f'{"Range":<10}{"Months":>8}{"Cells (ms)":>14}{"Months (ms)":>14}{"Crosstab (ms)":>16}')
+    for name, start_date in (
+        ('3 months', date(end_date.year - (end_date.month <= 3), (end_date.month - 4) % 12 + 1, 1)),
+        ('1 year', date(end_date.year - 1, end_date.month, 1)),
+        ('3 years', date(end_date.year - 3, end_date.month, 1)),
+        ('All', dataset.min_start_date),
+    ):
+        # The data as filtered by the sidebar dates
+        tournament_data = dataset.tournament_data.filter((pl.col('Start Date') >= start_date) & (pl.col('End Date') <= end_date))
+        list_data = list_view(dataset.list_data, dataset.game_data, tournament_data).collect()
+        score_cube = score_cube_view(
+            dataset.score_cube.filter(pl.col('tournament_id').is_in(tournament_data['tournament_id'].implode())),
+            tournament_data
+        ).collect()
+        date_range = pd.date_range(start=start_date, end=end_date, freq='MS')
+
+        cell_time, cells = measure_time(lambda: cell_counts(list_data, date_range), repeats)
+        month_time, months = measure_time(lambda: month_counts(score_cube, date_range), repeats)
+        crosstab_time, crosstabs = measure_time(lambda: crosstab_counts(score_cube, date_range), repeats)
+        # Every path has to give the same counts
+        assert np.array_equal(cells, months) and np.array_equal(cells, crosstabs)
+        print(f'{name:<10}{len(date_range):>8}' + ''.join(f'{t * 1000:>{w}.2f}' for t, w in zip((cell_time, month_time, crosstab_time), (14, 14, 16))))
+
+if __name__ == '__main__':
+    main()
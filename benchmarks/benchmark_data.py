@@ -0,0 +1,21 @@
+'''Load the data for the benchmarks as the app does, but with the snapshot and alias tables in a
+temporary folder, so running a benchmark leaves the snapshot of the app and the tracked alias
+tables alone.
+'''
+# File handling
+import os
+import shutil
+import tempfile
+import atexit
+
+# App functions
+from load_and_organise_data import load_and_organise_data
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_benchmark_data():
+    '''Load and organise the data in a temporary folder that is removed when the benchmark exits.'''
+    temp_dir = tempfile.mkdtemp(prefix='benchmark_')
+    atexit.register(shutil.rmtree, temp_dir, ignore_errors=True)
+    alias_dir = shutil.copytree(os.path.join(repo_dir, 'aliases'), os.path.join(temp_dir, 'aliases'))
+    return load_and_organise_data(snapshot_folder=os.path.join(temp_dir, 'snapshot'), alias_folder=alias_dir)
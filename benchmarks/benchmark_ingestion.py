@@ -0,0 +1,199 @@
+'''Compare the time and memory of building the ingestion frames from per-row dictionaries
+against the column buffers used by organise_tournament.
+
+Run from the repository root with:
+    python benchmarks/benchmark_ingestion.py [number of tournament folders]
+'''
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Timing and memory tracking
+import time
+import tracemalloc
+
+# Data analysis tools
+import polars as pl
+
+# Math functions
+from math import ceil
+
+# Dates and times
+from datetime import datetime
+
+# Loader functions
+from load_and_organise_data import read_tournament, organise_tournament, table_schemas, list_view, unit_view, option_view
+from helper_functions import correct_cap
+
+def view_frames(tournament_data, game_data, list_data, unit_data, option_data):
+    '''The list, unit and option views of the frames built by organise_tournament.'''
+    list_data = list_view(list_data, game_data, tournament_data).collect()
+    return list_data, unit_view(unit_data, list_data), option_view(option_data, list_data)
+
+# Schemas of the views, which the previous ingestion path built directly
+list_schema, unit_schema, option_schema = (
+    frame.schema for frame in view_frames(*(pl.DataFrame(schema=schema) for schema in table_schemas))
+)
+
+def organise_tournament_rows(tourn):
+    '''The previous ingestion path, which builds a dictionary for every list, unit and option.'''
+    list_rows = []
+    unit_rows = []
+    option_rows = []
+    g_ind = 0  # Game index
+    l_ind = 0  # List index
+    u_ind = 0  # Unit index
+
+    if tourn[0]['type'] == 0:
+        tourn_type = 'Teams'
+    elif tourn[0]['type'] == 1:
+        tourn_type = 'Singles'
+    else:
+        tourn_type = 'Unknown'
+
+    for game in tourn[1:]:
+        scores = (game['scoreOne'], game['scoreTwo'])
+        if sum(scores) != 20 or min(scores)<0:
+            continue
+        army = [correct_cap(game['armyOne']), correct_cap(game['armyTwo'])]
+        arm_key = ('armyListOne', 'armyListTwo')
+        player_id = (game.get('playerOneId'), game.get('playerTwoId'))
+        secondary = (game['secondaryPlayerOne'], game['secondaryPlayerTwo'])
+        if game['firstTurn'] == 0:
+            turn = ('First', 'Second')
+        elif game['firstTurn'] == 1:
+            turn = ('Second', 'First')
+        else:
+            turn = ('Unknown', 'Unknown')
+
+        for i in range(2):
+            if arm_key[i] in game:
+                is_list = True
+                alist = game[arm_key[i]]
+                list_points = 0
+                magicalness = game[arm_key[i]]['magicalness'] if not isinstance(game[arm_key[i]]['magicalness'], str) else None
+                for unit in alist['units']:
+                    num_models = unit.get('models', None)
+                    unit_rows.append({
+                        'list_id': l_ind,
+                        'unit_id': u_ind,
+                        'Name': unit['name'],
+                        'Category': unit['category'],
+                        'Cost': unit['cost'],
+                        'Models': num_models,
+                        'Score': scores[i],
+                    })
+                    list_points += unit['cost']
+                    for option in unit['options']:
+                        option_rows.append({
+                            'list_id': l_ind,
+                            'unit_id': u_ind,
+                            'Unit Name': unit['name'],
+                            'Option Name': option['name'],
+                            'Option Type': option['type'],
+                            'Score': scores[i],
+                        })
+                    if num_models:
+                        for model_count in range(5, 85, 5):
+                            if num_models <= model_count:
+                                model_count = f'{model_count-4}-{model_count} Models'
+                                break
+                        option_rows.append({
+                            'list_id': l_ind,
+                            'unit_id': u_ind,
+                            'Unit Name': unit['name'],
+                            'Option Name': model_count,
+                            'Option Type': 'Model Count',
+                            'Score': scores[i],
+                        })
+                    u_ind += 1
+            else:
+                list_points = None
+                magicalness = None
+                is_list = False
+
+            list_rows.append({
+                'game_id': g_ind,
+                'list_id': l_ind,
+                'List': is_list,
+                'Faction': army[i],
+                'Opponent': army[1-i],
+                'Score': scores[i],
+                'player_id': player_id[i],
+                'opponent_id': player_id[1-i],
+                'Turn': turn[i],
+                'Deployment': game.get('setup', dict()).get('deployment', 'Unknown'),
+                'Primary': game.get('setup', dict()).get('primary', 'Unknown'),
+                'Secondary': secondary[i],
+                'Opponent Secondary': secondary[1-i],
+                'Total Points': list_points,
+                'Magicalness': magicalness,
+                'Type': tourn_type,
+                'Tournament Size': tourn[0]['size'],
+                'Start Date': datetime.strptime(tourn[0]['start'], "%Y-%m-%d").date(),
+                'End Date': datetime.strptime(tourn[0]['end'], "%Y-%m-%d").date(),
+            })
+            l_ind += 1
+        g_ind += 1
+        points = [row['Total Points'] for row in list_rows[-2:] if row['Total Points'] is not None]
+        if points:
+            max_points = ceil( max(points) / 50)*50
+            list_rows[-1]['Game Size'] = max_points
+            list_rows[-2]['Game Size'] = max_points
+        else:
+            list_rows[-1]['Game Size'] = None
+            list_rows[-2]['Game Size'] = None
+
+    return (
+        pl.DataFrame(list_rows, schema=list_schema),
+        pl.DataFrame(unit_rows, schema=unit_schema),
+        pl.DataFrame(option_rows, schema=option_schema),
+    )
+
+def measure_time(organise, tournaments):
+    '''Time organise over the tournaments, returning the time and the frames.'''
+    start = time.perf_counter()
+    frames = [organise(tourn) for tourn in tournaments]
+    return time.perf_counter() - start, frames
+
+def measure_memory(organise, tournaments):
+    '''Track the largest Python heap growth while organising a single tournament.
+
+    This is done separately from the timing as tracemalloc slows down every allocation.
+    '''
+    peak_memory = 0
+    tracemalloc.start()
+    for tourn in tournaments:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        organise(tourn)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return peak_memory
+
+def main():
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    folder_names = sorted(name for name in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, name)))
+    if len(sys.argv) > 1:
+        folder_names = folder_names[:int(sys.argv[1])]
+    tournaments = [tourn for tourn in (read_tournament(os.path.join(data_dir, name)) for name in folder_names) if tourn]
+
+    row_time, row_frames = measure_time(organise_tournament_rows, tournaments)
+    column_time, column_frames = measure_time(organise_tournament, tournaments)
+    row_memory = measure_memory(organise_tournament_rows, tournaments)
+    column_memory = measure_memory(organise_tournament, tournaments)
+
+    # Both paths have to produce the same frames
+    for row_chunk, column_chunk in zip(row_frames, column_frames):
+        for row_frame, column_frame in zip(row_chunk, view_frames(*column_chunk)):
+            assert row_frame.equals(column_frame)
+
+    num_rows = sum(frame.height for chunk in column_frames for frame in chunk)
+    print(f'{len(tournaments)} tournaments, {num_rows} list, unit and option rows')
+    print(f'{"Path":<16}{"Time (s)":>12}{"Peak heap growth per tournament (MB)":>40}')
+    print(f'{"Row dicts":<16}{row_time:>12.2f}{row_memory / 1024**2:>40.2f}')
+    print(f'{"Column buffers":<16}{column_time:>12.2f}{column_memory / 1024**2:>40.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+'''Compare the time taken to build and render the matchup table of the scores page cell by cell,
+as it was first done by filtering the lists for every entry, against sorting the lists once for each
+kind of row, summing the means and errors of all the entries at once and colouring the entries with
+vectorised colours.
+
+Run from the repository root with:
+    python benchmarks/benchmark_matchup_table.py [number of repeats]
+'''
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Timing
+import time
+
+# Data analysis tools
+import polars as pl
+import pandas as pd
+import numpy as np
+import scipy.stats as stats
+
+# Dates and times
+from datetime import date
+
+# App functions
+from load_and_organise_data import list_view
+from helper_functions import colourmap, round_sig
+from scores_performance import matchup_table_df
+from constants import faction_keys
+from benchmark_data import load_benchmark_data
+
+def matchup_cell(scores):
+    '''The first formatting of an entry of the table, from the list of its scores.'''
+    if len(scores) == 0:
+        return ''
+    mean = np.mean(scores)
+    sem = stats.sem(scores) if len(scores) > 1 else 0
+    if sem < 1e-6:
+        return f'{int(mean)}'
+    mean, sem = round_sig(mean, sem)
+    return f'{mean}±{sem}'
+
+def colour_matchup(val):
+    '''The first colouring of an entry of the table.'''
+    if val in ('', '-'): return ''
+    try:
+        mean, sem = val.split('±')
+        mean = float(mean)
+        sem = float(sem)
+        z_score = (mean - 10) / sem if sem else 0
+        return f'color: {colourmap(z_score)}'
+    except:
+        return ''
+
+def cell_table(list_data, factions):
+    '''The first path, which filters the lists for each entry and colours the entries one at a time.'''
+    first_data = list_data.filter(pl.col('Turn') == 'First')
+    second_data = list_data.filter(pl.col('Turn') == 'Second')
+    rows = [
+        [matchup_cell(list_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+        [matchup_cell(first_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+        [matchup_cell(second_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+    ]
+    index = ['All', 'First', 'Second']
+    for opp in factions:
+        rows.append([
+            '-' if fac == opp else matchup_cell(list_data.filter((pl.col('Faction') == fac) & (pl.col('Opponent') == opp))['Score'].to_list())
+            for fac in factions
+        ])
+        index.append(opp)
+    return pd.DataFrame(rows, columns=factions, index=index).style.map(colour_matchup)
+
+def vector_table(list_data, factions):
+    '''The path used by the scores page.'''
+    matchup_df, matchup_styles = matchup_table_df(list_data, factions)
+    return matchup_df.style.apply(lambda _: matchup_styles, axis=None)
+
+def measure_time(build, repeats):
+    '''Time building and rendering the table over the repeats, returning the average times and the rendered table.'''
+    build_time = render_time = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        styler = build()
+        middle = time.perf_counter()
+        html = styler.set_uuid('matchup').to_html()
+        end = time.perf_counter()
+        build_time += middle - start
+        render_time += end - middle
+    return build_time / repeats, render_time / repeats, styler, html
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    dataset = load_benchmark_data()
+
+    def selected_lists(start_date, end_date, tournament_type='Any'):
+        '''The lists of the tournaments in the dates, and of the type, as selected in the sidebar.'''
+        tournament_data = dataset.tournament_data.filter((pl.col('Start Date') >= start_date) & (pl.col('End Date') <= end_date))
+        if tournament_type != 'Any':
+            tournament_data = tournament_data.filter(pl.col('Type') == tournament_type)
+        return list_view(dataset.list_data, dataset.game_data, tournament_data).collect()
+
+    # The lists of typical filters, and of ones where entries are easily rounded differently
+    selections = {
+        'All lists': selected_lists(dataset.min_start_date, dataset.max_end_date),
+        'Since 2025': selected_lists(date(2025, 1, 1), dataset.max_end_date),
+        'One month': selected_lists(date(2025, 3, 1), date(2025, 3, 31)),
+        'Ten days': selected_lists(date(2025, 3, 10), date(2025, 3, 20)),
+        'Teams': selected_lists(date(2024, 1, 1), date(2026, 6, 30), 'Teams'),
+        'No lists': selected_lists(dataset.max_end_date, dataset.min_start_date),
+    }
+
+    print(f'{"Selection":<12}{"Cells build (ms)":>18}{"Cells render (ms)":>19}{"Vector build (ms)":>19}{"Vector render (ms)":>20}')
+    for name, list_data in selections.items():
+        cell_build, cell_render, cell_styler, cell_html = measure_time(lambda: cell_table(list_data, faction_keys), repeats)
+        vector_build, vector_render, vector_styler, vector_html = measure_time(lambda: vector_table(list_data, faction_keys), repeats)
+        # Both paths have to give the same entries, colours and rendered table
+        assert cell_styler.data.equals(vector_styler.data)
+        assert cell_styler.ctx == vector_styler.ctx
+        assert cell_html == vector_html
+        print(f'{name:<12}' + ''.join(f'{t * 1000:>{w}.2f}' for t, w in zip((cell_build, cell_render, vector_build, vector_render), (18, 19, 19, 20))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+'''Compare the time taken to select the units and options of a set of lists by hashing the list ids
+with is_in against gathering the blocks of rows given by the row offset index, which filters with a
+mask of the rows instead when the lists are more than a tenth of all lists.
+
+Run from the repository root with:
+    python benchmarks/benchmark_row_index.py [number of repeats]
+'''
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Timing
+import time
+
+# Data analysis tools
+import polars as pl
+import numpy as np
+
+# Dates and times
+from datetime import date
+
+# Loader functions
+from load_and_organise_data import list_view, gather_lists, unit_columns, option_columns
+from benchmark_data import load_benchmark_data
+
+def filter_lists(child_data, list_data, columns):
+    '''The previous path, which keeps the rows whose list_id is in the lists and joins the list scores on.'''
+    return (
+        child_data
+        .filter(pl.col('list_id').is_in(list_data['list_id'].implode()))
+        .join(list_data.select('list_id', 'Score'), on='list_id', how='inner', maintain_order='left')
+        .select(columns)
+    )
+
+def index_lists(child_data, list_data, columns, row_index=None):
+    '''Gather the blocks of rows of the lists, from the row offsets if given or else by binary search.'''
+    rows, lengths = gather_lists(child_data, list_data['list_id'], row_index)
+    return rows.with_columns(pl.Series('Score', np.repeat(list_data['Score'].to_numpy(), lengths))).select(columns)
+
+def measure_time(select, repeats):
+    '''Time select over the repeats, returning the average time and the selected frame.'''
+    start = time.perf_counter()
+    for _ in range(repeats):
+        selected = select()
+    return (time.perf_counter() - start) / repeats, selected
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    dataset = load_benchmark_data()
+    unit_data, option_data, unit_index, option_index = dataset.unit_data, dataset.option_data, dataset.unit_index, dataset.option_index
+    all_lists = list_view(dataset.list_data, dataset.game_data, dataset.tournament_data).collect()
+
+    # The lists selected by typical filters
+    selections = {
+        'All lists': all_lists,
+        'Since 2025': all_lists.filter(pl.col('Start Date') >= date(2025, 1, 1)),
+        'Teams': all_lists.filter(pl.col('Type') == 'Teams'),
+        'One faction': all_lists.filter(pl.col('Faction') == all_lists['Faction'][0]),
+        'One list': all_lists.head(1),
+    }
+
+    print(f'{"Selection":<14}{"Table":<8}{"Rows":>10}{"is_in (ms)":>14}{"Search (ms)":>14}{"Index (ms)":>14}')
+    for name, lists in selections.items():
+        for table, child_data, columns, row_index in (
+            ('Unit', unit_data, unit_columns, unit_index),
+            ('Option', option_data, option_columns, option_index),
+        ):
+            filter_time, filtered = measure_time(lambda: filter_lists(child_data, lists, columns), repeats)
+            search_time, searched = measure_time(lambda: index_lists(child_data, lists, columns), repeats)
+            index_time, indexed = measure_time(lambda: index_lists(child_data, lists, columns, row_index), repeats)
+            # All the paths have to select the same rows
+            assert filtered.equals(searched) and filtered.equals(indexed)
+            print(f'{name:<14}{table:<8}{filtered.height:>10}' + ''.join(f'{t * 1000:>14.2f}' for t in (filter_time, search_time, index_time)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+'''Pack each tournament folder of the data directory into a single gzip compressed NDJSON file,
+so the loader reads one file per tournament instead of one per game report.
+
+The metadata goes on the first line, followed by the reports in file name order, which is the
+order load_and_organise_data reads a folder in. The loader reads packed and loose tournaments
+alike, and a folder that has been packed is ignored in favour of its packed file, unless the
+folder changed after it was packed, in which case the folder is read and a warning printed.
+
+Run from the repository root with:
+    python compact_data.py [data directory] [--remove]
+
+With --remove the folders are deleted once they have been packed, unless any of their files,
+such as invalid JSON, could not be packed.
+'''
+# File handling and JSON parsing
+import os
+import sys
+import gzip
+import shutil
+import orjson
+
+# Loader functions
+from load_and_organise_data import read_tournament, PACKED_SUFFIX
+
+def pack_tournament(folder_path, file_path):
+    '''Function to pack a tournament folder into a single file.
+
+    Returns:
+        tuple: The number of documents packed and the paths of the invalid JSON files that were skipped.
+    '''
+    skipped = []
+    tourn = read_tournament(folder_path, skipped)
+    # Write under a temporary name and move it into place so the loader never sees a partial file
+    with gzip.open(file_path + '.tmp', 'wb') as f:
+        f.write(b''.join(orjson.dumps(document) + b'\n' for document in tourn))
+    os.replace(file_path + '.tmp', file_path)
+    return len(tourn), skipped
+
+def compact_data_folder(data_dir, remove=False):
+    '''Function to pack every tournament folder in the data directory, optionally removing the folders.
+
+    A folder is only removed if every file in it was packed, so folders with invalid JSON or any other
+    files are kept, and listed at the end.
+    '''
+    num_folders = 0
+    num_documents = 0
+    kept_folders = []
+    for folder_name in sorted(os.listdir(data_dir)):
+        folder_path = os.path.join(data_dir, folder_name)
+        if not os.path.isdir(folder_path):
+            continue
+        num_packed, skipped = pack_tournament(folder_path, folder_path + PACKED_SUFFIX)
+        num_documents += num_packed
+        num_folders += 1
+        if remove:
+            if skipped or num_packed != len(os.listdir(folder_path)):
+                kept_folders.append(folder_path)
+            else:
+                shutil.rmtree(folder_path)
+    print(f'Packed {num_documents} JSON files from {num_folders} tournament folders in {data_dir}')
+    if kept_folders:
+        print(f'Kept {len(kept_folders)} folders with files that were not packed:')
+        for folder_path in kept_folders:
+            print(f'    {folder_path}')
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--remove']
+    data_dir = args[0] if args else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    compact_data_folder(data_dir, remove='--remove' in sys.argv[1:])
+
+if __name__ == '__main__':
+    main()
@@ -9,4 +9,17 @@ faction_names = ['Beast Herds', 'Dread Elves', 'Dwarven Holds',\
             'Infernal Dwarves', 'Kingdom of Equitaine', 'Ogre Khans',\
             'Orcs and Goblins', 'Saurian Ancients', 'Sylvan Elves',\
             'Undying Dynasties', 'Vampire Covenant', 'Vermin Swarm',\
-            'Warriors of the Dark Gods']
\ No newline at end of file
+            'Warriors of the Dark Gods']
+# Classes of options, which the loader finds once for each Option Type so the pages can filter on them
+# An Option Type is in the first class whose rule it matches, where the lowercase Option Type has to equal one
+# of the 'equals' values or contain one of the 'contains' values, otherwise it is in 'Other'
+option_class_rules = {
+    'Model Count': {'equals': ['model count']},
+    'Path': {'equals': ['path']},
+    'Faction Item': {'contains': [
+        'magic items', 'favour', 'gifts of the dark gods', 'blood power', 'manifestations', 'honour',
+        'battle runes', 'big name', 'heroic traits', 'aspect of nature', 'howdah', 'totems',
+    ]},
+    'Equipment': {'equals': ['mount'], 'contains': ['weapons']},
+}
+option_classes = [*option_class_rules, 'Other']
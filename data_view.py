@@ -0,0 +1,164 @@
+'''Views of the lists selected by the sidebar filters and the pages.
+
+A view holds the raw tables shared by every session and the positions of the selected lists in
+the list table, instead of filtered copies of the tables. Pages ask the view for the columns they
+use, and only those columns are materialised, for only the selected lists and their units and options.
+'''
+# Copying views
+import copy
+
+# Data analysis tools
+import polars as pl
+import numpy as np
+
+# Loader functions
+from load_and_organise_data import list_columns, unit_columns, option_columns, gather_lists
+
+def list_rows(list_data, game_data, tournament_data):
+    '''Function to find the positions in the list table of the lists of the given games and tournaments, in order.'''
+    return (
+        list_data.lazy()
+        .select('game_id')
+        .with_row_index('row')
+        .join(game_data.lazy().select('game_id', 'tournament_id'), on='game_id', how='inner', maintain_order='left')
+        .join(tournament_data.lazy().select('tournament_id'), on='tournament_id', how='inner', maintain_order='left')
+        .collect()['row']
+        .to_numpy()
+    )
+
+class DataView:
+    '''A selection of lists from the raw tables, materialised a column at a time.
+
+    The columns are those of list_view, unit_view and option_view, and the rows come in the order
+    of the list table, so the frames are the same as filtering the views.
+    '''
+
+    def __init__(self, tournament_data, game_data, list_data, unit_data, option_data, unit_index, option_index, faction_rows,
+                 rows=None):
+        self.tournament_data = tournament_data
+        self.game_data = game_data
+        self.list_data = list_data
+        self.unit_data = unit_data
+        self.option_data = option_data
+        self.unit_index = unit_index
+        self.option_index = option_index
+        # Positions of the lists of each faction in the list table, from partition_factions
+        self.faction_rows = faction_rows
+        # Positions of the selected lists in the list table, every list by default
+        self.rows = np.arange(list_data.height) if rows is None else rows
+
+    @property
+    def num_lists(self):
+        return len(self.rows)
+
+    def estimated_size(self):
+        '''Function to get the memory used by the view itself, as the tables are shared.'''
+        return self.rows.nbytes
+
+    def with_rows(self, rows):
+        '''Function to get a view of the same tables selecting the lists at the given positions.'''
+        view = copy.copy(self)
+        view.rows = rows
+        return view
+
+    def select(self, game_data, tournament_data):
+        '''Function to get a view of the selected lists that belong to the given games and tournaments.'''
+        selected = np.zeros(self.list_data.height, dtype=bool)
+        selected[list_rows(self.list_data, game_data, tournament_data)] = True
+        return self.with_rows(self.rows[selected[self.rows]])
+
+    def filter(self, predicate):
+        '''Function to get a view of the selected lists that meet the predicate, an expression on the list columns.'''
+        mask = self.lists(*dict.fromkeys(predicate.meta.root_names())).select(predicate.fill_null(False)).to_series().to_numpy()
+        return self.with_rows(self.rows[mask])
+
+    def faction(self, faction):
+        '''Function to get a view of the selected lists of a faction.
+
+        The faction's partition is looked up in the selected positions, so only that faction's lists
+        are touched and no list column is materialised.
+        '''
+        partition = self.faction_rows.get(faction, np.empty(0, dtype=self.rows.dtype))
+        found = np.searchsorted(self.rows, partition)
+        found[found == len(self.rows)] = 0
+        return self.with_rows(partition[self.rows[found] == partition] if len(self.rows) else self.rows)
+
+    def split_columns(self, columns):
+        '''Function to split the given list_view columns into the list columns needed and the game and tournament columns.'''
+        game_columns = [col for col in self.game_data.columns if col in columns and col not in self.list_data.columns]
+        tournament_columns = [col for col in self.tournament_data.columns if col in columns and col not in self.game_data.columns]
+        # The game_id is needed to join the game and tournament columns on
+        needed = [col for col in self.list_data.columns if col in columns or (col == 'game_id' and (game_columns or tournament_columns))]
+        return needed, game_columns, tournament_columns
+
+    def join_games(self, lists, columns, game_columns, tournament_columns):
+        '''Function to lazily join the given game and tournament columns onto lists and select the columns.'''
+        if game_columns or tournament_columns:
+            games = self.game_data.lazy().select(
+                col for col in self.game_data.columns
+                if col == 'game_id' or col in game_columns or (col == 'tournament_id' and tournament_columns)
+            )
+            lists = lists.join(games, on='game_id', how='left', maintain_order='left')
+        if tournament_columns:
+            tournaments = self.tournament_data.lazy().select('tournament_id', *tournament_columns)
+            lists = lists.join(tournaments, on='tournament_id', how='left', maintain_order='left')
+        return lists.select(columns)
+
+    def lists(self, *columns):
+        '''Function to materialise the given columns of the selected lists, all the list_view columns by default.'''
+        columns = list(columns) or list_columns
+        needed, game_columns, tournament_columns = self.split_columns(columns)
+        # Only the list columns needed are gathered, and the game and tournament columns are joined onto them
+        lists = self.list_data.select(needed)[self.rows].lazy()
+        return self.join_games(lists, columns, game_columns, tournament_columns).collect()
+
+    def lazy_lists(self, *columns):
+        '''Function to get a lazy query of the given columns of the selected lists, all the list_view columns by default.
+
+        The selection is a filter of the shared list table on the ids of the selected lists, so the filters
+        and aggregations the pages add are pushed down to the table by the query optimiser before anything
+        is materialised.
+        '''
+        columns = list(columns) or list_columns
+        needed, game_columns, tournament_columns = self.split_columns(columns)
+        lists = self.list_data.lazy().filter(self.selected_lists()).select(needed)
+        return self.join_games(lists, columns, game_columns, tournament_columns)
+
+    def selected_lists(self):
+        '''Function to get an expression that is true for the rows of the selected lists in any table with a list_id.'''
+        if len(self.rows) == self.list_data.height:
+            return pl.lit(True)
+        return pl.col('list_id').is_in(self.list_data['list_id'].gather(self.rows).implode())
+
+    def units(self, *columns):
+        '''Function to materialise the given columns of the units of the selected lists, all the unit_view columns by default.'''
+        return self.gather_children(self.unit_data, self.unit_index, list(columns) or unit_columns)
+
+    def options(self, *columns):
+        '''Function to materialise the given columns of the options of the selected lists, all the option_view columns by default.'''
+        return self.gather_children(self.option_data, self.option_index, list(columns) or option_columns)
+
+    def gather_children(self, child_data, row_index, columns):
+        '''Function to gather the given columns of the unit or option rows of the selected lists, repeating the list scores over them.'''
+        child_columns = [col for col in columns if col != 'Score']
+        children, lengths = gather_lists(child_data.select(child_columns), self.list_data['list_id'].to_numpy()[self.rows], row_index)
+        if 'Score' in columns:
+            children = children.with_columns(pl.Series('Score', np.repeat(self.list_data['Score'].to_numpy()[self.rows], lengths)))
+        return children.select(columns)
+
+    def lazy_units(self, *columns):
+        '''Function to get a lazy query of the given columns of the units of the selected lists, all the unit_view columns by default.'''
+        return self.lazy_children(self.unit_data, list(columns) or unit_columns)
+
+    def lazy_options(self, *columns):
+        '''Function to get a lazy query of the given columns of the options of the selected lists, all the option_view columns by default.'''
+        return self.lazy_children(self.option_data, list(columns) or option_columns)
+
+    def lazy_children(self, child_data, columns):
+        '''Function to get a lazy query of the given columns of the unit or option rows of the selected lists, joining the list scores on.'''
+        # The list_id is needed to join the scores on
+        needed = [col for col in child_data.columns if col in columns or (col == 'list_id' and 'Score' in columns)]
+        children = child_data.lazy().filter(self.selected_lists()).select(needed)
+        if 'Score' in columns:
+            children = children.join(self.list_data.lazy().select('list_id', 'Score'), on='list_id', how='left', maintain_order='left')
+        return children.select(columns)
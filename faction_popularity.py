@@ -10,107 +10,109 @@ import polars as pl
 import pandas as pd
 import numpy as np
 
-@st.fragment()
-def faction_list_count(tournament_type, list_data, faction_keys, start_date, end_date):
-    '''Helper function to create a bar chart of the number of games played with each faction.'''
-
-    poss_splits = ['No Split', 'By Turn', 'By Opponent Faction', 'By Score', 'By Date']
-    if tournament_type == 'Any':
-        poss_splits.append('By Singles or Teams')
-    
-    bar_stack = st.pills('Select Bar Split', poss_splits, default='By Turn')
-
-    # Make a histogram of the number of games played with each faction
+# Import helper function
+from helper_functions import binned_counts
+
+def crosstab(rows, split, split_values, faction_keys, weight=None):
+    '''Helper function to count the lists of each faction with each value of a split in a single grouped aggregation.
+
+    Args:
+        rows (pl.DataFrame or pl.LazyFrame): The lists, or totals of lists, to count.
+        split (pl.Expr): The expression to split the lists by.
+        split_values (list): The values of the split to count, where any others are left out.
+        faction_keys (list): The factions to count.
+        weight (pl.Expr): An expression with the number of lists in each row, or None to count the rows.
+
+    Returns:
+        np.ndarray: The counts, with a row for each split value and a column for each faction.
+    '''
+    return binned_counts(rows.lazy(), [(split, split_values), (pl.col('Faction'), faction_keys)], weight, 'Faction popularity')[:-1, :-1]
+
+def stacked_bars(ax, counts, labels, stack_down=False):
+    '''Helper function to draw a bar for each faction, stacked by the rows of counts in the order of labels.
+
+    The stacks start from the bottom of the bars, or from the top if stack_down is set.
+    '''
+    ind = np.arange(counts.shape[1])
+    width = 0.7
+    below = (np.cumsum(counts[::-1], axis=0)[::-1] if stack_down else np.cumsum(counts, axis=0)) - counts
+    for label, count, bottom in zip(labels, counts, below):
+        ax.bar(ind, count, width, bottom=bottom, label=label)
+    return ind
+
+def score_bin(score_bins, score_labels):
+    '''Helper function to label each score with the bin it falls in, where the bins start at each of score_bins.'''
+    # Scores are never negative, so the first bin has no lower bound
+    score = pl.col('Score')
+    binned = pl.when(score < score_bins[1]).then(pl.lit(score_labels[0]))
+    for upper, label in zip(score_bins[2:], score_labels[1:]):
+        binned = binned.when(score < upper).then(pl.lit(label))
+    return binned.otherwise(pl.lit(score_labels[-1]))
+
+def split_counts(bar_stack, data_view, score_totals, score_cube, faction_keys, start_date, end_date):
+    '''Helper function to count the games of each faction split by the selection, as a row of counts for each value of the split.
+
+    Returns:
+        tuple: The counts, the labels of their rows, the options of the legend (or None) and whether to stack down.
+    '''
+    lists = pl.col('Lists')
     if bar_stack == 'No Split' or bar_stack is None:
-        counts = np.array([list_data.filter(pl.col('Faction') == fac).height for fac in faction_keys])
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        ax.bar(ind, counts, width)
-        
+        counts = crosstab(score_totals, pl.lit(True), [True], faction_keys, lists)
+        return counts, [None], None, False
+
     elif bar_stack == 'By Turn':
         turns = ['First', 'Second', 'Unknown']
-        counts = {turn: np.array([list_data.filter((pl.col('Faction') == fac) & (pl.col('Turn') == turn)).height for fac in faction_keys]) for turn in turns}
-
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        ax.bar(ind, counts['First'], width, bottom=counts['Unknown'] + counts['Second'], label='First')
-        ax.bar(ind, counts['Second'], width, bottom=counts['Unknown'], label='Second')
-        ax.bar(ind, counts['Unknown'], width, label='Unknown')
-        ax.legend(title='Turn')
+        counts = crosstab(score_totals, pl.col('Turn'), turns, faction_keys, lists)
+        return counts, turns, {'title': 'Turn'}, True
 
     elif bar_stack == 'By Opponent Faction':
-        opponent_factions = list_data.select('Opponent').unique().to_series().to_list()
-        counts = {opp: np.array([list_data.filter((pl.col('Faction') == fac) & (pl.col('Opponent') == opp)).height for fac in faction_keys]) for opp in opponent_factions}
-
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        bottom = np.zeros(len(faction_keys))
-        for opp in opponent_factions:
-            ax.bar(ind, counts[opp], width, bottom=bottom, label=opp)
-            bottom += counts[opp]
-        ax.legend(title='Opponent Faction', bbox_to_anchor=(1, 1))
+        opponent_factions = score_totals.select('Opponent').unique().to_series().to_list()
+        counts = crosstab(score_totals, pl.col('Opponent'), opponent_factions, faction_keys, lists)
+        return counts, opponent_factions, {'title': 'Opponent Faction', 'bbox_to_anchor': (1, 1)}, False
 
     elif bar_stack == 'By Score':
         score_bins = [0, 4, 8, 13, 17]
         score_labels = ['<4', '4-7', '8-12', '13-16', '>16']
-        counts = {score: np.array([
-            list_data.filter(
-                (pl.col('Faction') == fac) & (pl.col('Score') < score_bins[i+1]) & (pl.col('Score') >= score_bins[i])
-            ).height if i < len(score_bins)-1 else
-            list_data.filter(
-                (pl.col('Faction') == fac) & (pl.col('Score') >= score_bins[i])
-            ).height for fac in faction_keys
-        ]) for i, score in enumerate(score_labels)}
-
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        bottom = np.zeros(len(faction_keys))
-        for score in score_labels:
-            ax.bar(ind, counts[score], width, bottom=bottom, label=score)
-            bottom += counts[score]
-        ax.legend(title='Score')
+        counts = crosstab(data_view.lazy_lists('Faction', 'Score'), score_bin(score_bins, score_labels), score_labels, faction_keys)
+        return counts, score_labels, {'title': 'Score'}, False
 
     elif bar_stack == 'By Date':
         # Create monthly bins between start_date and end_date
         date_range = pd.date_range(start=start_date, end=end_date, freq='MS')
         date_labels = [date.strftime('%Y-%m') for date in date_range]
-        counts = {}
-        for date in date_range:
-            start = date.date()
-            end = (date + pd.DateOffset(months=1)).date()
-            label = date.strftime('%Y-%m')
-            counts[label] = np.array([
-                list_data.filter(
-                    (pl.col('Faction') == fac) &
-                    (pl.col('Start Date') >= start) &
-                    (pl.col('Start Date') < end)
-                ).height for fac in faction_keys
-            ])
-
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        bottom = np.zeros(len(faction_keys))
-        for date in date_labels:
-            ax.bar(ind, counts[date], width, bottom=bottom, label=date)
-            bottom += counts[date]
-        ax.legend(title='Month', bbox_to_anchor=(1, 1))
+        monthly_counts = (
+            score_cube.lazy()
+            .select('Faction', 'Start Date', 'Lists')
+            .sort('Start Date')
+            .group_by_dynamic('Start Date', every='1mo', group_by='Faction')
+            .agg(lists.sum())
+        )
+        counts = crosstab(monthly_counts, pl.col('Start Date'), [date.date() for date in date_range], faction_keys, lists)
+        return counts, date_labels, {'title': 'Month', 'bbox_to_anchor': (1, 1)}, False
 
     elif bar_stack == 'By Singles or Teams':
         types = ['Singles', 'Teams']
-        counts = {t: np.array([list_data.filter((pl.col('Faction') == fac) & (pl.col('Type') == t)).height for fac in faction_keys]) for t in types}
+        counts = crosstab(score_cube, pl.col('Type'), types, faction_keys, lists)
+        return counts, types, {'title': 'Tournament Type'}, True
+
+@st.fragment()
+def faction_list_count(tournament_type, data_view, score_totals, score_cube, faction_keys, start_date, end_date):
+    '''Helper function to create a bar chart of the number of games played with each faction.'''
+
+    poss_splits = ['No Split', 'By Turn', 'By Opponent Faction', 'By Score', 'By Date']
+    if tournament_type == 'Any':
+        poss_splits.append('By Singles or Teams')
+    
+    bar_stack = st.pills('Select Bar Split', poss_splits, default='By Turn')
 
-        ind = np.arange(len(faction_keys))
-        width = 0.7
-        fig, ax = plt.subplots(layout='constrained')
-        ax.bar(ind, counts['Singles'], width, bottom=counts['Teams'], label='Singles')
-        ax.bar(ind, counts['Teams'], width, label='Teams')
-        ax.legend(title='Tournament Type')
+    counts, labels, legend, stack_down = split_counts(
+        bar_stack, data_view, score_totals, score_cube, faction_keys, start_date, end_date
+    )
 
+    fig, ax = plt.subplots(layout='constrained')
+    ind = stacked_bars(ax, counts, labels, stack_down)
+    if legend is not None:
+        ax.legend(**legend)
 
     ax.set_xticks(ind)
     ax.set_xticklabels(faction_keys, rotation=45, ha='right')
@@ -123,7 +125,37 @@ def faction_list_count(tournament_type, list_data, faction_keys, start_date, end
     st.pyplot(fig)
     plt.close(fig)
 
-def popularity_page(tournament_type, faction_keys, list_data, start_date, end_date):
+# Cached by the key of the sidebar filters, as the pairings only change with them
+@st.cache_data(max_entries=16, show_spinner=False)
+def pairing_percentages(filter_key, _data_view, faction_keys):
+    '''Helper function to get the percent of the team games of each faction played against each opponent.
+
+    Returns:
+        tuple: The factions and opponents with team games, the matrix of percents with a row for all opponents
+            followed by a row for each opponent and a column for each faction, and the number of lists in team games.
+    '''
+    team_games = _data_view.lazy_lists('Faction', 'Opponent', 'Type').filter(pl.col('Type') == 'Teams')
+    # Number of games of each opponent (rows) against each faction (columns)
+    counts = binned_counts(
+        team_games, [(pl.col('Opponent'), faction_keys), (pl.col('Faction'), faction_keys)], label='Pairing popularity'
+    )[:-1, :-1]
+    faction_totals = counts.sum(axis=0)
+    All = faction_totals.sum()
+    has_games = faction_totals > 0
+    has_opponent_games = counts.sum(axis=1) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_matrix = np.vstack([
+            np.round(faction_totals / All * 100, 1),
+            counts[has_opponent_games] / faction_totals * 100,
+        ])
+    return (
+        [fac for fac, kept in zip(faction_keys, has_games) if kept],
+        [opp for opp, kept in zip(faction_keys, has_opponent_games) if kept],
+        percent_matrix[:, has_games],
+        All,
+    )
+
+def popularity_page(tournament_type, faction_keys, data_view, score_totals, score_cube, start_date, end_date, filter_key):
     st.title('Faction Popularity')
 
     st.subheader('Faction Popularity')
@@ -131,8 +163,8 @@ def popularity_page(tournament_type, faction_keys, list_data, start_date, end_da
     st.markdown('<p>The pie chart below shows the popularity of each faction as a percentage of all games played.</p>', 
                 unsafe_allow_html=True)
     # Make a pie chart of the number of games played with each faction
-    faction_counts = list_data.group_by('Faction').agg([
-        pl.count().alias('num_games')
+    faction_counts = score_totals.group_by('Faction').agg([
+        pl.col('Lists').sum().alias('num_games')
     ]).sort('num_games', descending=True)
     faction_counts_pd = faction_counts.to_pandas()
     fig, ax = plt.subplots(layout='constrained')
@@ -148,7 +180,7 @@ def popularity_page(tournament_type, faction_keys, list_data, start_date, end_da
                 You can use the widget to decide how to show stacks in the bars.</p>''', unsafe_allow_html=True)
     
     # Show the bar chart (in a fragment to avoid the widget recomputing the whole page)
-    faction_list_count(tournament_type, list_data, faction_keys, start_date, end_date)
+    faction_list_count(tournament_type, data_view, score_totals, score_cube, faction_keys, start_date, end_date)
 
     st.subheader('Pairing Popularity')
     if tournament_type == 'Singles':
@@ -156,23 +188,7 @@ def popularity_page(tournament_type, faction_keys, list_data, start_date, end_da
                     information about pairing popularity in team tournaments.')
         return
 
-    team_games = list_data.filter(pl.col('Type') == 'Teams')
-    # Count games for each (Opponent, Faction) pair
-    counts = team_games.group_by(['Opponent', 'Faction']).agg([
-        pl.count().alias('num_games')
-    ])
-    # Pivot to wide format
-    counts_pivot = counts.pivot(
-        values='num_games',
-        index='Opponent',
-        columns='Faction'
-    ).fill_null(0)
-    # For each Faction, compute the total number of games played (as Faction)
-    faction_totals = team_games.group_by('Faction').agg([
-        pl.count().alias('All')
-    ])
-    # Total number of games
-    All = faction_totals['All'].sum()
+    factions, opponents, percent_matrix, All = pairing_percentages(filter_key, data_view, faction_keys)
 
     st.markdown(f'The heatmap below shows the percentage of games each faction has been paired against an opponent in a team tournament \
                 out of all games played by that faction in team tournaments. \
@@ -182,25 +198,11 @@ def popularity_page(tournament_type, faction_keys, list_data, start_date, end_da
                 given the current selections, the total number of games played in team tournaments is {All//2}.</p>',
                 unsafe_allow_html=True)
 
-    # Calculate the percent for each (Opponent, Faction) entry
-    percent_table = counts_pivot.clone()
-    for col in percent_table.columns:
-        if col != 'Opponent':
-            total = faction_totals.filter(pl.col('Faction') == col)['All'][0]
-            percent_table = percent_table.with_columns([
-                (pl.col(col) / total * 100).alias(col)
-            ])
-    # Add "All" row: percent of games played as each faction (sum over opponents)
-    all_row = faction_totals.with_columns([
-        (pl.col('All') / All * 100).round(1)
-    ])
-    # Convert to pandas for heatmap
-    percent_table_pd = percent_table.to_pandas().set_index('Opponent')
-    all_row_pd = all_row.to_pandas().set_index('Faction').T
-    percent_table_pd = pd.concat([all_row_pd, percent_table_pd])
-
-    sns.heatmap(
-        percent_table_pd,
+    # The "All" row is the percent of the team games played as each faction
+    ax = sns.heatmap(
+        percent_matrix,
+        xticklabels=factions,
+        yticklabels=['All', *opponents],
         annot=True,
         fmt='.0f',
         cmap='Blues',
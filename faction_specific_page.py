@@ -202,22 +202,8 @@ def faction_specific_page(faction_name, flist_data, funit_data, foption_data):
                 unsafe_allow_html=True)
     
     # Compute magic item statistics
-    # Identify magic items by checking Option Type or Option Name for the substring "magic" (case-insensitive)
-    magic_cond = (
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('magic items')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('favour')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('gifts of the dark gods')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('blood power')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('manifestations')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('honour')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('battle runes')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('big names')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('big name')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('heroic traits')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('aspect of nature')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('howdah')) |
-        (pl.col('Option Name').is_not_null() & pl.col('Option Type').str.to_lowercase().str.contains('totems'))
-    )
+    # Faction wide options (magic items and the like) are classified from their Option Type by the loader
+    magic_cond = pl.col('Option Name').is_not_null() & (pl.col('Option Class') == 'Faction Item')
 
     foption_magic_all = foption_data.filter(magic_cond)
 
@@ -548,7 +534,7 @@ def faction_specific_page(faction_name, flist_data, funit_data, foption_data):
             (pl.col('avg_score') - overall_mean).alias('Average Score Effect Size'),
         ])
         .rename({'Name': 'Unit Name'})
-        .with_columns(pl.lit('Base').alias('Option Name'))
+        .with_columns(pl.lit('Base', dtype=pl.Categorical).alias('Option Name'))
     )
 
     # COMBINE
@@ -0,0 +1,70 @@
+'''A process wide cache of the data filtered by the sidebar, shared read only by every session.
+
+Most sessions keep the default filters, so the filtered data for the same filter values is
+computed once and handed to every session that asks for them. Polars frames and data views are
+never modified in place, so sharing them is safe as long as the pages only derive new ones from them.
+'''
+# Thread safety, as every session runs in its own thread
+import threading
+from collections import OrderedDict
+
+def result_size(result):
+    '''Function to estimate the memory used by the frames and views of a cached result, in bytes.'''
+    return sum(item.estimated_size() for item in result if hasattr(item, 'estimated_size'))
+
+class FilterCache:
+    '''A least recently used cache bounded by the number of entries and by their estimated size.'''
+
+    def __init__(self, max_entries=16, max_bytes=512 * 1024**2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (result, size), least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        '''Function to return the result cached under key, computing and caching it on a miss.
+
+        The result is computed outside the lock so other sessions are not held up, which means two
+        sessions missing on the same key at once may both compute it. Results larger than the whole
+        cache are returned without being cached.
+        '''
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        result = compute()
+        size = result_size(result)
+        with self.lock:
+            if key not in self.entries and size <= self.max_bytes:
+                self.entries[key] = (result, size)
+                self.size += size
+                # Evict the least recently used entries until both bounds are met
+                while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.size -= evicted_size
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        '''Function to drop every entry, keeping the hit and miss counts.'''
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        '''Function to get the hit, miss and eviction counts and the current number and size of the entries.'''
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'size_mb': self.size / 1024**2,
+            }
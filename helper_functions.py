@@ -1,4 +1,6 @@
 import streamlit as st
+import polars as pl
+import numpy as np
 from math import log, floor
 
 from constants import faction_keys
@@ -30,6 +32,21 @@ def colourmap(value):
     hue = 120 - 120*v*v*(3-2*v)  # Cubic easing for smoother transition
     return f'hsl({int(hue)}, 100%, {v*(1-v)*50+20}%)'
 
+# Colourmap over a whole array of values at once
+def colourmap_array(values):
+    '''Map an array of values to HSL colour strings, the same as colourmap applied to each value.
+
+    Args:
+        values (np.ndarray): The values to map.
+
+    Returns:
+        list: The colour strings, in the order of the flattened values.
+    '''
+    v = np.abs(np.clip(np.asarray(values, dtype=float).ravel(), -3.5, 3.5)) / 3.5
+    hue = 120 - 120*v*v*(3-2*v)
+    lightness = v*(1-v)*50+20
+    return [f'hsl({h}, 100%, {l}%)' for h, l in zip(hue.astype(int).tolist(), lightness.tolist())]
+
 # Function to round a number and its error to correct number of significant digits
 def round_sig(num, err):
     '''Round a number and its associated error to the appropriate significant digits.
@@ -55,4 +72,100 @@ def round_sig(num, err):
         return ( int(round( num, ndigits = sig_dig )), int(round( err, ndigits = sig_dig )) )
     else:
         return (int(round(num)), int(round(num)))
-         
\ No newline at end of file
+         
+# Function to get the means and standard errors of many samples at once
+def mean_sem_array(count, total, squared_total):
+    '''Compute the means and standard errors of the mean of samples from arrays of their sizes, sums and sums of squares.
+
+    Args:
+        count (np.ndarray): The number of values in each sample.
+        total (np.ndarray): The sums of the values.
+        squared_total (np.ndarray): The sums of the squared values.
+
+    Returns:
+        tuple: Arrays of the means, which are nan for empty samples, and of the standard errors, which are 0 for samples of at most one value.
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        sem = np.sqrt((count * squared_total - total * total) / (count * count * (count - 1)))
+    return mean, np.where(count < 2, 0.0, sem)
+
+# Function to count rows in bins with a single group_by
+def binned_counts(rows, keys, weight=None, label='Counts'):
+    '''Count the rows of a query in every combination of the given bins at once.
+
+    The rows are grouped by the keys in one pass and the groups are scattered into an array, so the counts
+    of any selection of bins are then sums over the array instead of more passes over the rows.
+
+    Args:
+        rows (pl.LazyFrame): The rows to count.
+        keys (list): Pairs of an expression and the values it is binned by. Rows with any other value,
+            including null, are counted in an extra last bin.
+        weight (pl.Expr): An expression to sum over the rows of each bin instead of counting them, or None.
+        label (str): A name for the query shown above its plan by collect_queries.
+
+    Returns:
+        np.ndarray: The counts, with an axis for each key of length one more than the number of its values.
+    '''
+    names = [f'key_{i}' for i in range(len(keys))]
+    groups, = collect_queries(label, (
+        rows.group_by([expr.alias(name) for (expr, _), name in zip(keys, names)])
+        .agg((pl.len() if weight is None else weight.sum()).alias('count'))
+    ))
+    index = tuple(
+        np.array([positions.get(value, len(values)) for value in groups[name].to_list()], dtype=np.int64)
+        for (_, values), name in zip(keys, names)
+        for positions in [{value: i for i, value in enumerate(values)}]
+    )
+    counts = np.zeros([len(values) + 1 for _, values in keys], dtype=np.int64)
+    np.add.at(counts, index, groups['count'].to_numpy())
+    return counts
+
+# Function to get the score statistics of the lists taking each option
+def option_score_stats(list_data, option_data, key='Option Name'):
+    '''Compute the number of lists taking each option and the mean and variance of their scores with one join and group_by.
+
+    A list counts once for an option, however many times it takes it, and only lists in list_data count.
+
+    Args:
+        list_data (pl.DataFrame or pl.LazyFrame): The lists, with their list_id and Score.
+        option_data (pl.DataFrame or pl.LazyFrame): The options of the lists, with their list_id and the key column.
+        key (str): The column of the options to group by.
+
+    Returns:
+        pl.DataFrame: The number of lists ('Lists'), mean score ('Mean') and variance of the scores ('Variance') for each value of the key.
+    '''
+    return (
+        option_data.lazy()
+        .select('list_id', key)
+        .unique()
+        .join(list_data.lazy().select('list_id', 'Score'), on='list_id', how='inner')
+        .group_by(key)
+        .agg(
+            pl.len().alias('Lists'),
+            pl.col('Score').mean().alias('Mean'),
+            pl.col('Score').var().alias('Variance'),
+        )
+        .collect()
+    )
+
+# Function to run the lazy queries of a page
+def collect_queries(label, *queries):
+    '''Collect lazy queries together, so the parts they share are only computed once.
+
+    Operators can see the optimised plans, including the filters and columns pushed down to the
+    shared tables, by adding ?query_plans to the URL. Inside a cached function the plans are shown
+    when the entry is computed, and Streamlit replays them when the entry is reused.
+
+    Args:
+        label (str): A name for the queries shown above their plans.
+        *queries (pl.LazyFrame): The queries to collect.
+
+    Returns:
+        list: The collected frames, in the order of the queries.
+    '''
+    if 'query_plans' in st.query_params:
+        with st.expander(f'Query plans: {label}'):
+            for query in queries:
+                st.code(query.explain())
+    return pl.collect_all(queries)
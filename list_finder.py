@@ -20,9 +20,10 @@ from constants import faction_names, faction_keys
 
 # Helper functions
 from helper_functions import colourmap, round_sig
+from load_and_organise_data import gather_lists, classified_option_columns
 
 @st.fragment()
-def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_data):
+def list_finder_page(faction_keys, magic_paths, data_view):
     ''' The content of the list finder page '''
 
     # The title of the page
@@ -45,9 +46,10 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
     fkey = faction_keys[ faction_names.index(faction_name) ]
 
     # Filter the data for the selected faction including only games that submitted lists
-    flist_data = list_data.filter((pl.col('Faction') == fkey) & pl.col('List'))
-    funit_data = unit_data.filter(pl.col('list_id').is_in(flist_data['list_id'].implode()))
-    foption_data = option_data.filter(pl.col('list_id').is_in(flist_data['list_id']))
+    faction_view = data_view.faction(fkey).filter(pl.col('List'))
+    flist_data = faction_view.lists()
+    funit_data = faction_view.units()
+    foption_data = faction_view.options(*classified_option_columns)
 
     num_faction_lists = flist_data.height
     avg_faction_lists = flist_data['Score'].mean()
@@ -93,13 +95,13 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
 
         select_options = set(st.multiselect(
             f'Select Options {plural and "these" or "this"} {select_unit} MUST have',
-            sorted( foption_data.filter((pl.col('Unit Name') == select_unit) & (pl.col('Option Type') != 'Model Count'))['Option Name'].unique().to_list() ),
+            sorted( foption_data.filter((pl.col('Unit Name') == select_unit) & (pl.col('Option Class') != 'Model Count'))['Option Name'].unique().to_list() ),
             key=f'option_select_{len(selected_units)}'
         ))
 
         ban_options = set(st.multiselect(
             f'Select Options {plural and "these" or "this"} {select_unit} CAN NOT have',
-            sorted( foption_data.filter((pl.col('Unit Name') == select_unit) & (pl.col('Option Type') != 'Model Count'))['Option Name'].unique().to_list() ),
+            sorted( foption_data.filter((pl.col('Unit Name') == select_unit) & (pl.col('Option Class') != 'Model Count'))['Option Name'].unique().to_list() ),
             key=f'option_ban_{len(selected_units)}'
         ))
 
@@ -131,7 +133,7 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
                 the deployment type. Note that the 'Unknown' option indicates games where no
                 deployment information is available.</p>''', unsafe_allow_html=True)
 
-    all_deployments = list_data['Deployment'].unique().to_list()
+    all_deployments = data_view.lists('Deployment')['Deployment'].unique().to_list()
     deployment = st.multiselect('Select Deployment',
                             all_deployments,
                             default=all_deployments,
@@ -141,7 +143,7 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
                 the primary deployment type. Note that the 'Unknown' option indicates games where no
                 deployment information is available.</p>''', unsafe_allow_html=True)
 
-    all_primaries = list_data['Primary'].unique().to_list()
+    all_primaries = data_view.lists('Primary')['Primary'].unique().to_list()
     primary = st.multiselect('Select Primary',
                             all_primaries,
                             default=all_primaries,
@@ -170,9 +172,9 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
         # Get the valid list ids
         valid_list_ids = flist_data['list_id'].unique()
 
-        # Now filter the unit and option data for these list ids
-        funit_data = funit_data.filter(pl.col('list_id').is_in(valid_list_ids))
-        foption_data = foption_data.filter(pl.col('list_id').is_in(valid_list_ids))
+        # Now gather the unit and option data of these lists
+        funit_data = gather_lists(funit_data, flist_data['list_id'])[0]
+        foption_data = gather_lists(foption_data, flist_data['list_id'])[0]
 
         # Check if no units have been selected and, if so, show the data as is.
         if not selected_units:
@@ -204,13 +206,13 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
 
         # Now filter the data for valid list ids
         flist_data = flist_data.filter(pl.col('list_id').is_in(valid_list_ids))
-        funit_data = funit_data.filter(pl.col('list_id').is_in(valid_list_ids))
-        foption_data = foption_data.filter(pl.col('list_id').is_in(valid_list_ids))
+        funit_data = gather_lists(funit_data, flist_data['list_id'])[0]
+        foption_data = gather_lists(foption_data, flist_data['list_id'])[0]
 
         # Next, filter for the selected options
         matched_list_ids = [] # List to store the lists that are matched to the selected and banned options
         for list_id in valid_list_ids:
-            units_in_list = funit_data.filter(pl.col('list_id') == list_id)
+            units_in_list = gather_lists(funit_data, [list_id])[0]
             # For each unique unit name, get all unit_ids
             unit_id_assignments = []
             for unit_name, count in unit_counts:
@@ -252,8 +254,8 @@ def list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_dat
             st.warning('No lists found matching the specified criteria. Please adjust your selections and try again.')
             return
         # If lists remain filter the unit and option data as well
-        funit_data = funit_data.filter(pl.col('list_id').is_in(matched_list_ids))
-        foption_data = foption_data.filter(pl.col('list_id').is_in(matched_list_ids))
+        funit_data = gather_lists(funit_data, flist_data['list_id'])[0]
+        foption_data = gather_lists(foption_data, flist_data['list_id'])[0]
 
         # Show the data on the filtered lists
         show_filtered_data(faction_name, matched_list_ids, flist_data, funit_data, foption_data, num_faction_lists, avg_faction_lists, var_faction_lists)
@@ -380,7 +382,7 @@ def show_filtered_data(faction_name, matched_list_ids, flist_data, funit_data, f
         st.markdown(f'''<h5>{cat}</h5><ul>''', unsafe_allow_html=True)
         units = these_units.filter(pl.col('Category') == cat)
         for unit in units.to_dicts():
-            uoptions = these_options.filter((pl.col('unit_id') == unit['unit_id'])&(pl.col('Option Type') != 'Model Count'))['Option Name'].to_list()
+            uoptions = these_options.filter((pl.col('unit_id') == unit['unit_id'])&(pl.col('Option Class') != 'Model Count'))['Option Name'].to_list()
             option_list = ', '+', '.join(uoptions) if uoptions else ''
             if 'Models' in unit and unit['Models'] is not None:
                 st.markdown(f'''<li><b>{unit['Models']} {unit['Name']}</b>{option_list} - {unit['Cost']}</li>''', unsafe_allow_html=True)
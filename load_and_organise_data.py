@@ -3,14 +3,23 @@ import streamlit as st
 
 # File handling and JSON parsing
 import os
+import sys
+import gzip
 import orjson
+import hashlib
+
+# Parallel processing
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Data analysis tools
 import polars as pl
+import numpy as np
 
-# String matching
-import Levenshtein
-from collections import Counter, defaultdict
+# Memory mapped Arrow files
+import pyarrow as pa
+import pyarrow.ipc
 
 # Math functions
 from math import ceil
@@ -20,225 +29,840 @@ from datetime import datetime
 
 # Helper functions
 from helper_functions import correct_cap
+from constants import option_class_rules, option_classes
+from name_correction import correct_unit_names, correct_option_names, read_aliases, write_aliases
 
-def correct_unit_names(unit_rows, list_rows):
-    '''Function to correct unit names that differ by a single character within the same faction.'''
-    # Map list_id to faction for quick lookup
-    list_id_to_faction = {row['list_id']: row['Faction'] for row in list_rows}
-    # Group unit names by faction
-    faction_units = defaultdict(list)
-    for row in unit_rows:
-        faction = list_id_to_faction.get(row['list_id'])
-        if faction:
-            faction_units[faction].append(row['Name'])
-    # Find corrections
-    name_corrections = {}
-    for faction, names in faction_units.items():
-        name_counts = Counter(names)
-        unique_names = list(name_counts.keys())
-        for i, name1 in enumerate(unique_names):
-            for name2 in unique_names[i+1:]:
-                if Levenshtein.distance(name1, name2) == 1:
-                    popular = name1 if name_counts[name1] >= name_counts[name2] else name2
-                    less_popular = name2 if popular == name1 else name1
-                    name_corrections[(faction, less_popular)] = popular
-    # Apply corrections
-    for row in unit_rows:
-        faction = list_id_to_faction.get(row['list_id'])
-        key = (faction, row['Name'])
-        if key in name_corrections:
-            row['Name'] = name_corrections[key]
-    return unit_rows
-
-def correct_option_names(option_rows):
-    '''Function to correct option names that differ by a single character within the same unit.'''
-    # Group option names by Unit Name
-    unit_options = defaultdict(list)
-    for row in option_rows:
-        unit_options[row['Unit Name']].append(row['Option Name'])
-    # Find corrections
-    option_corrections = {}
-    option_type_corrections = {}
-    for unit_name, options in unit_options.items():
-        option_counts = Counter(options)
-        unique_options = list(option_counts.keys())
-        for i, opt1 in enumerate(unique_options):
-            for opt2 in unique_options[i+1:]:
-                if Levenshtein.distance(opt1, opt2) == 1:
-                    popular = opt1 if option_counts[opt1] >= option_counts[opt2] else opt2
-                    less_popular = opt2 if popular == opt1 else opt1
-                    option_corrections[(unit_name, less_popular)] = popular
-    # Update Option Type to match the most popular variant
-    for row in option_rows:
-        key = (row['Unit Name'], row['Option Name'])
-        if key in option_corrections:
-            # Find the most common Option Type for the corrected name
-            corrected_name = option_corrections[key]
-            types = [r['Option Type'] for r in option_rows if r['Unit Name'] == row['Unit Name'] and r['Option Name'] == corrected_name]
-            if types:
-                most_common_type = Counter(types).most_common(1)[0][0]
-                row['Option Name'] = corrected_name
-                row['Option Type'] = most_common_type
-    return option_rows
-
-
-# Cached function to load and organise the data
-@st.cache_data
-def load_and_organise_data(root_folder='data'):
-    '''Function to load and organise data from JSON files in the specified root folder.'''
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, root_folder)
-    if not os.path.exists(data_dir):
-        raise FileNotFoundError(f'The specified path does not exist: {data_dir}')
+# Schemas of the organised data
+# Repeated strings are dictionary encoded. Closed sets of values are Enums, everything else is
+# Categorical, which shares one global mapping of strings so frames built in different processes
+# can be concatenated, joined and compared without re-encoding
+turn_dtype = pl.Enum(['First', 'Second', 'Unknown'])
+type_dtype = pl.Enum(['Singles', 'Teams', 'Unknown'])
+option_class_dtype = pl.Enum(option_classes)
+# The data is normalised into tournament and game tables and list, unit and option tables
+# that only hold their own measures and the ids of the rows they belong to
+tournament_schema = {
+    'tournament_id': pl.Int64,
+    'Name': pl.String,
+    'Type': type_dtype,
+    'Tournament Size': pl.Int64,
+    'Start Date': pl.Date,
+    'End Date': pl.Date,
+}
+game_schema = {
+    'game_id': pl.Int64,
+    'tournament_id': pl.Int64,
+    'Deployment': pl.Categorical,
+    'Primary': pl.Categorical,
+    'Game Size': pl.Int64,
+}
+list_schema = {
+    'game_id': pl.Int64,
+    'list_id': pl.Int64,
+    'List': pl.Boolean,
+    'Faction': pl.Categorical,
+    'Opponent': pl.Categorical,
+    'Score': pl.Int64,
+    'player_id': pl.String,
+    'opponent_id': pl.String,
+    'Turn': turn_dtype,
+    'Secondary': pl.Boolean,
+    'Opponent Secondary': pl.Boolean,
+    'Total Points': pl.Int64,
+    'Magicalness': pl.Int64,
+}
+unit_schema = {
+    'list_id': pl.Int64,
+    'unit_id': pl.Int64,
+    'Name': pl.Categorical,
+    'Category': pl.Categorical,
+    'Cost': pl.Int64,
+    'Models': pl.Int64,
+}
+# Unit Name is the name of the unit as written in the list, before unit names are corrected
+option_schema = {
+    'list_id': pl.Int64,
+    'unit_id': pl.Int64,
+    'Unit Name': pl.Categorical,
+    'Option Name': pl.Categorical,
+    'Option Type': pl.Categorical,
+}
+table_schemas = (tournament_schema, game_schema, list_schema, unit_schema, option_schema)
 
-    list_rows = []
-    unit_rows = []
-    option_rows = []
-    g_ind = 0  # Game index
-    l_ind = 0  # List index
-    u_ind = 0  # Unit index
+# Columns of the joined list, unit and option views used by the pages
+list_columns = [
+    'game_id', 'list_id', 'List', 'Faction', 'Opponent', 'Score', 'player_id', 'opponent_id', 'Turn',
+    'Deployment', 'Primary', 'Secondary', 'Opponent Secondary', 'Total Points', 'Magicalness',
+    'Type', 'Tournament Size', 'Start Date', 'End Date', 'Game Size',
+]
+unit_columns = ['list_id', 'unit_id', 'Name', 'Category', 'Cost', 'Models', 'Score']
+option_columns = ['list_id', 'unit_id', 'Unit Name', 'Option Name', 'Option Type', 'Score']
+# The Option Class is only used to filter the options, so pages that filter on it ask for it explicitly
+# and it stays out of the option tables shown and downloaded on the Raw Data page
+classified_option_columns = [*option_columns, 'Option Class']
 
-    # Loop through all folders and files, process as we read
-    for folder_name in sorted(os.listdir(data_dir)):
-        folder_path = os.path.join(data_dir, folder_name)
-        if os.path.isdir(folder_path):
-            tourn_data = []
-            for file_name in sorted(os.listdir(folder_path)):
-                if file_name.endswith('.json'):
-                    file_path = os.path.join(folder_path, file_name)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        try:
-                            data = orjson.loads(f.read())
-                            tourn_data.append(data)
-                        except orjson.JSONDecodeError:
-                            print(f'Skipping invalid JSON: {file_path}')
-            if not tourn_data:
-                continue
-            # Process tournament data
-            tourn = tourn_data
-            if tourn[0]['type'] == 0:
-                tourn_type = 'Teams'
-            elif tourn[0]['type'] == 1:
-                tourn_type = 'Singles'
-            else:
-                tourn_type = 'Unknown'
-
-            for game in tourn[1:]:
-                scores = (game['scoreOne'], game['scoreTwo'])
-                # Make sure the score is valid
-                if sum(scores) != 20 or min(scores)<0:
-                    continue
-                army = [correct_cap(game['armyOne']), correct_cap(game['armyTwo'])]
-                arm_key = ('armyListOne', 'armyListTwo')
-                player_id = (game.get('playerOneId'), game.get('playerTwoId'))
-                secondary = (game['secondaryPlayerOne'], game['secondaryPlayerTwo'])
-                if game['firstTurn'] == 0:
-                    turn = ('First', 'Second')
-                elif game['firstTurn'] == 1:
-                    turn = ('Second', 'First')
-                else:
-                    turn = ('Unknown', 'Unknown')
-
-                for i in range(2):
-                    if arm_key[i] in game:
-                        is_list = True
-                        alist = game[arm_key[i]]
-                        list_points = 0
-                        magicalness = game[arm_key[i]]['magicalness'] if not isinstance(game[arm_key[i]]['magicalness'], str) else None
-                        for unit in alist['units']:
-                            num_models = unit.get('models', None)
-                            unit_rows.append({
-                                'list_id': l_ind,
-                                'unit_id': u_ind,
-                                'Name': unit['name'],
-                                'Category': unit['category'],
-                                'Cost': unit['cost'],
-                                'Models': num_models,
-                                'Score': scores[i],
-                            })
-                            list_points += unit['cost']
-                            for option in unit['options']:
-                                option_rows.append({
-                                    'list_id': l_ind,
-                                    'unit_id': u_ind,
-                                    'Unit Name': unit['name'],
-                                    'Option Name': option['name'],
-                                    'Option Type': option['type'],
-                                    'Score': scores[i],
-                                })
-                            if num_models:
-                                for model_count in range(5, 85, 5):
-                                    if num_models <= model_count:
-                                        model_count = f'{model_count-4}-{model_count} Models'
-                                        break
-                                option_rows.append({
-                                    'list_id': l_ind,
-                                    'unit_id': u_ind,
-                                    'Unit Name': unit['name'],
-                                    'Option Name': model_count,
-                                    'Option Type': 'Model Count',
-                                    'Score': scores[i],
-                                })
-                            u_ind += 1
-                    else:
-                        list_points = None
-                        magicalness = None
-                        is_list = False
-
-                    list_rows.append({
-                        'game_id': g_ind,
-                        'list_id': l_ind,
-                        'List': is_list,
-                        'Faction': army[i],
-                        'Opponent': army[1-i],
-                        'Score': scores[i],
-                        'player_id': player_id[i],
-                        'opponent_id': player_id[1-i],
-                        'Turn': turn[i],
-                        'Deployment': game.get('setup', dict()).get('deployment', 'Unknown'),
-                        'Primary': game.get('setup', dict()).get('primary', 'Unknown'),
-                        'Secondary': secondary[i],
-                        'Opponent Secondary': secondary[1-i],
-                        'Total Points': list_points,
-                        'Magicalness': magicalness,
-                        'Type': tourn_type,
-                        'Tournament Size': tourn[0]['size'],
-                        'Start Date': datetime.strptime(tourn[0]['start'], "%Y-%m-%d").date(),
-                        'End Date': datetime.strptime(tourn[0]['end'], "%Y-%m-%d").date(),
-                    })
-                    l_ind += 1
-                g_ind += 1
-                points = [row['Total Points'] for row in list_rows[-2:] if row['Total Points'] is not None]
-                if points:
-                    max_points = ceil( max(points) / 50)*50
-                    list_rows[-1]['Game Size'] = max_points
-                    list_rows[-2]['Game Size'] = max_points
-                else:
-                    list_rows[-1]['Game Size'] = None
-                    list_rows[-2]['Game Size'] = None
-
-    num_games = g_ind
+def list_view(list_data, game_data, tournament_data):
+    '''Function to lazily join the game and tournament columns onto the lists.
 
-    # Correct unit and option names
-    unit_rows = correct_unit_names(unit_rows, list_rows)
-    option_rows = correct_option_names(option_rows)
-
-    # Convert to Polars DataFrames
-    raw_list_data = pl.DataFrame(list_rows)#.with_columns([
-    #     pl.col('Faction').cast(pl.Categorical),
-    #     pl.col('Turn').cast(pl.Categorical)
-    # ])
-    
-    raw_unit_data = pl.DataFrame(unit_rows)
-    raw_option_data = pl.DataFrame(option_rows)
+    Only the lists of the given games and tournaments are kept, so filtered games and tournaments filter the lists.
+    '''
+    return (
+        list_data.lazy()
+        .join(game_data.lazy(), on='game_id', how='inner', maintain_order='left')
+        .join(tournament_data.lazy(), on='tournament_id', how='inner', maintain_order='left')
+        .select(list_columns)
+    )
+
+def build_row_index(child_data, num_lists):
+    '''Function to build the row offsets of the lists in a unit or option table.
+
+    Ids are assigned in order during ingestion, so the table is sorted by list_id and the rows of list i
+    are the block offsets[i]:offsets[i + 1], which is empty for lists without rows.
+    '''
+    if not child_data['list_id'].is_sorted():
+        raise ValueError('The rows must be sorted by list_id to be indexed.')
+    return np.searchsorted(child_data['list_id'].to_numpy(), np.arange(num_lists + 1), side='left')
+
+def partition_factions(list_data):
+    '''Function to partition the positions of the lists in the list table by faction.
+
+    Units and options are gathered by list, so the positions of a faction's lists are enough to pick out
+    its part of every table, without copying or reordering the tables themselves.
+
+    Returns:
+        dict: The ascending positions of the lists of each faction, by faction.
+    '''
+    partitions = (
+        list_data.lazy()
+        .select(pl.col('Faction').cast(pl.String))
+        .with_row_index('row')
+        .group_by('Faction')
+        .agg(pl.col('row').sort())
+        .collect()
+    )
+    return {faction: rows.to_numpy() for faction, rows in zip(partitions['Faction'], partitions['row'])}
+
+def gather_lists(child_data, list_ids, row_index=None):
+    '''Function to gather the rows of the given lists from a unit or option table sorted by list_id.
+
+    The blocks of rows are found from the offsets of build_row_index if given, otherwise by binary searching
+    the list_id column, so filtered tables can be gathered from as well. When the offsets are given and the
+    lists are in ascending order and more than a tenth of all lists, the table is filtered with a mask of the
+    rows of the lists instead, which is quicker than gathering that many rows one by one.
+
+    Args:
+        child_data (pl.DataFrame): The table to gather from, sorted by list_id.
+        list_ids (array-like): The ids of the lists to gather, each at most once.
+        row_index (np.ndarray): The row offsets of the table, or None.
+
+    Returns:
+        tuple: The gathered rows, list by list in the order of list_ids, and the number of rows of each list.
+    '''
+    list_ids = np.asarray(list_ids, dtype=np.int64)
+    if row_index is not None and len(list_ids) * 10 > len(row_index) - 1 and np.all(list_ids[1:] > list_ids[:-1]):
+        list_lengths = np.diff(row_index)
+        selected = np.zeros(len(list_lengths), dtype=bool)
+        selected[list_ids] = True
+        return child_data.filter(pl.Series(np.repeat(selected, list_lengths))), list_lengths[list_ids]
+    if row_index is None:
+        child_ids = child_data['list_id'].to_numpy()
+        starts = np.searchsorted(child_ids, list_ids, side='left')
+        ends = np.searchsorted(child_ids, list_ids, side='right')
+    else:
+        starts = row_index[list_ids]
+        ends = row_index[list_ids + 1]
+    lengths = ends - starts
+    # Row numbers of every block, laid out one after the other
+    rows = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return child_data[rows], lengths
+
+def unit_view(unit_data, list_data, unit_index=None):
+    '''Function to gather the units of the given lists with the list scores joined on, in the order of the lists.'''
+    units, lengths = gather_lists(unit_data, list_data['list_id'], unit_index)
+    return units.with_columns(pl.Series('Score', np.repeat(list_data['Score'].to_numpy(), lengths))).select(unit_columns)
+
+def option_view(option_data, list_data, option_index=None):
+    '''Function to gather the options of the given lists with the list scores joined on, in the order of the lists.'''
+    options, lengths = gather_lists(option_data, list_data['list_id'], option_index)
+    return options.with_columns(pl.Series('Score', np.repeat(list_data['Score'].to_numpy(), lengths))).select(option_columns)
+
+# Keys of the score cube. The sidebar filters select whole tournaments and game sizes, so slicing
+# the cube on these keys gives exactly the statistics of the filtered lists
+score_cube_keys = ['tournament_id', 'Game Size', 'Faction', 'Opponent', 'Turn']
+
+def build_score_cube(list_data, game_data):
+    '''Function to aggregate the lists into the number of lists, the sum of their scores and the sum of their
+    squared scores for every tournament, game size, faction, opponent and turn.'''
+    return (
+        list_data.lazy()
+        .join(game_data.lazy().select('game_id', 'tournament_id', 'Game Size'), on='game_id', how='inner')
+        .group_by(score_cube_keys)
+        .agg(
+            pl.len().alias('Lists'),
+            pl.col('Score').sum().alias('Score Sum'),
+            (pl.col('Score') ** 2).sum().alias('Score Squared Sum'),
+        )
+        .sort(score_cube_keys)
+        .collect()
+    )
+
+def score_cube_view(score_cube, tournament_data):
+    '''Function to lazily join the tournament type and start date onto the score cube, keeping only the cells of the given tournaments.'''
+    return (
+        score_cube.lazy()
+        .join(tournament_data.lazy().select('tournament_id', 'Type', 'Start Date'), on='tournament_id', how='inner', maintain_order='left')
+    )
+
+def sum_score_cube(score_cube):
+    '''Function to sum the score cube over tournaments and game sizes, giving the score totals of every faction, opponent and turn.'''
+    return score_cube.group_by('Faction', 'Opponent', 'Turn').agg(pl.col('Lists', 'Score Sum', 'Score Squared Sum').sum())
+
+def build_date_index(score_cube, tournament_data):
+    '''Function to build a prefix sum index of the score totals over the tournaments sorted by start date.
+
+    The score totals of every faction, opponent and turn are accumulated tournament by tournament into an
+    array of shape (tournaments + 1, factions, factions, turns, 3), so the totals of the tournaments in any
+    date range are the difference of two of its rows. Tournaments without dates or a size are left out, as
+    the sidebar filters never select them.
+    '''
+    tournaments = (
+        tournament_data
+        .filter(pl.col('tournament_id').is_in(score_cube['tournament_id'].implode()))
+        .drop_nulls(['Tournament Size', 'Start Date', 'End Date'])
+        .sort('Start Date', 'tournament_id')
+    )
+    factions = sorted(set(score_cube['Faction'].cast(pl.String)) | set(score_cube['Opponent'].cast(pl.String)))
+    faction_index = {fac: i for i, fac in enumerate(factions)}
+    turns = turn_dtype.categories.to_list()
+
+    cells = score_cube.join(tournaments.select('tournament_id').with_row_index('position'), on='tournament_id', how='inner')
+    position = cells['position'].to_numpy()
+    faction = cells['Faction'].cast(pl.String).replace_strict(faction_index).to_numpy()
+    opponent = cells['Opponent'].cast(pl.String).replace_strict(faction_index).to_numpy()
+    turn = cells['Turn'].to_physical().to_numpy()
+
+    cumulative = np.zeros((tournaments.height + 1, len(factions), len(factions), len(turns), 3), dtype=np.int64)
+    np.add.at(cumulative[1:], (position, faction, opponent, turn), cells.select('Lists', 'Score Sum', 'Score Squared Sum').to_numpy())
+    np.cumsum(cumulative, axis=0, out=cumulative)
+
+    return {
+        'start': tournaments['Start Date'].to_numpy(),
+        'end': tournaments['End Date'].to_numpy(),
+        'factions': np.array(factions),
+        'turns': np.array(turns),
+        'cumulative': cumulative,
+    }
+
+def date_range_totals(date_index, start_date, end_date):
+    '''Function to get the score totals of every faction, opponent and turn over the tournaments that start on
+    or after start_date and end on or before end_date, in the same form as sum_score_cube.'''
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+    cumulative = date_index['cumulative']
+    first = np.searchsorted(date_index['start'], start, side='left')
+    last = max(first, np.searchsorted(date_index['start'], end, side='right'))
+    totals = cumulative[last] - cumulative[first]
+    # Tournaments that start in the range but end after it are not in the range
+    for position in first + np.flatnonzero(date_index['end'][first:last] > end):
+        totals -= cumulative[position + 1] - cumulative[position]
+
+    faction, opponent, turn = np.nonzero(totals[..., 0])
+    return pl.DataFrame({
+        'Faction': date_index['factions'][faction],
+        'Opponent': date_index['factions'][opponent],
+        'Turn': date_index['turns'][turn],
+        'Lists': totals[faction, opponent, turn, 0],
+        'Score Sum': totals[faction, opponent, turn, 1],
+        'Score Squared Sum': totals[faction, opponent, turn, 2],
+    }).with_columns(pl.col('Faction', 'Opponent').cast(pl.Categorical), pl.col('Turn').cast(turn_dtype))
+
+def classify_option_type(option_type):
+    '''Function to find the class of an Option Type, from the first of the option_class_rules it matches.'''
+    option_type = option_type.lower()
+    for option_class, rule in option_class_rules.items():
+        if option_type in rule.get('equals', []) or any(substring in option_type for substring in rule.get('contains', [])):
+            return option_class
+    return 'Other'
+
+def classify_options(option_data):
+    '''Function to add the Option Class column to the option data, classifying each distinct Option Type once.
+
+    The classes are found when the data is loaded rather than stored in the snapshot, so changing the
+    rules in constants.py does not need the data to be parsed again.
+    '''
+    option_types = option_data.select(pl.col('Option Type').unique().drop_nulls())
+    option_type_classes = option_types.with_columns(pl.Series(
+        'Option Class',
+        [classify_option_type(option_type) for option_type in option_types['Option Type'].cast(pl.String)],
+        dtype=option_class_dtype
+    ))
+    option_class = (
+        option_data
+        .select('Option Type')
+        .join(option_type_classes, on='Option Type', how='left', maintain_order='left')
+        .select(pl.col('Option Class').fill_null('Other'))
+        .to_series()
+    )
+    return option_data.with_columns(option_class)
+
+def get_magic_paths(option_data):
+    '''Function to get a sorted list of all the magic paths in the classified option data.'''
     magic_paths = (
-        raw_option_data
-        .filter(pl.col('Option Type') == 'Path')
+        option_data
+        .filter(pl.col('Option Class') == 'Path')
         .select('Option Name')
         .unique()
         .to_series()
         .to_list()
     )
+    return sorted(magic_paths)
+
+# Suffix of the files that compact_data.py packs tournament folders into
+PACKED_SUFFIX = '.ndjson.gz'
+
+def read_packed_tournament(file_path, skipped=None):
+    '''Function to read the metadata and reports of a packed tournament file, one JSON document per line.'''
+    with gzip.open(file_path, 'rb') as f:
+        lines = f.read().splitlines()
+    tourn_data = []
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            tourn_data.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            print(f'Skipping invalid JSON: {file_path} line {line_number}')
+            if skipped is not None:
+                skipped.append(f'{file_path} line {line_number}')
+    return tourn_data
+
+def read_tournament(folder_path, skipped=None):
+    '''Function to read the metadata and reports of a tournament folder or packed tournament file, metadata first.
+
+    The invalid JSON files, or lines of a packed file, are skipped, and added to the skipped list if one is given.
+    '''
+    if folder_path.endswith(PACKED_SUFFIX):
+        return read_packed_tournament(folder_path, skipped)
+    tourn_data = []
+    for file_name in sorted(os.listdir(folder_path)):
+        if file_name.endswith('.json'):
+            file_path = os.path.join(folder_path, file_name)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                try:
+                    data = orjson.loads(f.read())
+                    tourn_data.append(data)
+                except orjson.JSONDecodeError:
+                    print(f'Skipping invalid JSON: {file_path}')
+                    if skipped is not None:
+                        skipped.append(file_path)
+    return tourn_data
+
+def organise_tournament(tourn):
+    '''Function to organise a tournament into tournament, game, list, unit and option data.
+
+    Values are appended straight onto one buffer per column rather than building a dictionary
+    per row, and the tournament row is built once from the metadata. Ids start from zero.
+
+    Args:
+        tourn (list): The tournament metadata followed by its game reports.
+
+    Returns:
+        tuple: The tournament, game, list, unit and option data of the tournament.
+    '''
+    # Column buffers
+    games = {name: [] for name in game_schema}
+    lists = {name: [] for name in list_schema}
+    units = {name: [] for name in unit_schema}
+    options = {name: [] for name in option_schema}
+    g_ind = 0  # Game index
+    l_ind = 0  # List index
+    u_ind = 0  # Unit index
+
+    if tourn[0]['type'] == 0:
+        tourn_type = 'Teams'
+    elif tourn[0]['type'] == 1:
+        tourn_type = 'Singles'
+    else:
+        tourn_type = 'Unknown'
+
+    for game in tourn[1:]:
+        scores = (game['scoreOne'], game['scoreTwo'])
+        # Make sure the score is valid
+        if sum(scores) != 20 or min(scores)<0:
+            continue
+        army = [correct_cap(game['armyOne']), correct_cap(game['armyTwo'])]
+        arm_key = ('armyListOne', 'armyListTwo')
+        player_id = (game.get('playerOneId'), game.get('playerTwoId'))
+        secondary = (game['secondaryPlayerOne'], game['secondaryPlayerTwo'])
+        if game['firstTurn'] == 0:
+            turn = ('First', 'Second')
+        elif game['firstTurn'] == 1:
+            turn = ('Second', 'First')
+        else:
+            turn = ('Unknown', 'Unknown')
+        setup = game.get('setup', dict())
+        game_points = []
+
+        for i in range(2):
+            if arm_key[i] in game:
+                is_list = True
+                alist = game[arm_key[i]]
+                list_points = 0
+                magicalness = alist['magicalness'] if not isinstance(alist['magicalness'], str) else None
+                for unit in alist['units']:
+                    num_models = unit.get('models', None)
+                    units['list_id'].append(l_ind)
+                    units['unit_id'].append(u_ind)
+                    units['Name'].append(unit['name'])
+                    units['Category'].append(unit['category'])
+                    units['Cost'].append(unit['cost'])
+                    units['Models'].append(num_models)
+                    list_points += unit['cost']
+                    unit_options = [(option['name'], option['type']) for option in unit['options']]
+                    if num_models:
+                        for model_count in range(5, 85, 5):
+                            if num_models <= model_count:
+                                model_count = f'{model_count-4}-{model_count} Models'
+                                break
+                        unit_options.append((model_count, 'Model Count'))
+                    for option_name, option_type in unit_options:
+                        options['Option Name'].append(option_name)
+                        options['Option Type'].append(option_type)
+                    options['list_id'].extend([l_ind] * len(unit_options))
+                    options['unit_id'].extend([u_ind] * len(unit_options))
+                    options['Unit Name'].extend([unit['name']] * len(unit_options))
+                    u_ind += 1
+                game_points.append(list_points)
+            else:
+                list_points = None
+                magicalness = None
+                is_list = False
+
+            lists['game_id'].append(g_ind)
+            lists['list_id'].append(l_ind)
+            lists['List'].append(is_list)
+            lists['Faction'].append(army[i])
+            lists['Opponent'].append(army[1-i])
+            lists['Score'].append(scores[i])
+            lists['player_id'].append(player_id[i])
+            lists['opponent_id'].append(player_id[1-i])
+            lists['Turn'].append(turn[i])
+            lists['Secondary'].append(secondary[i])
+            lists['Opponent Secondary'].append(secondary[1-i])
+            lists['Total Points'].append(list_points)
+            lists['Magicalness'].append(magicalness)
+            l_ind += 1
+
+        games['game_id'].append(g_ind)
+        games['tournament_id'].append(0)
+        games['Deployment'].append(setup.get('deployment', 'Unknown'))
+        games['Primary'].append(setup.get('primary', 'Unknown'))
+        games['Game Size'].append(ceil( max(game_points) / 50)*50 if game_points else None)
+        g_ind += 1
+
+    # Build the frames
+    tournament_data = pl.DataFrame({
+        'tournament_id': [0],
+        'Name': [tourn[0].get('name')],
+        'Type': [tourn_type],
+        'Tournament Size': [tourn[0]['size']],
+        'Start Date': [datetime.strptime(tourn[0]['start'], "%Y-%m-%d").date()],
+        'End Date': [datetime.strptime(tourn[0]['end'], "%Y-%m-%d").date()],
+    }, schema=tournament_schema)
+    game_data = pl.DataFrame(games, schema=game_schema)
+    list_data = pl.DataFrame(lists, schema=list_schema)
+    unit_data = pl.DataFrame(units, schema=unit_schema)
+    option_data = pl.DataFrame(options, schema=option_schema)
+    return tournament_data, game_data, list_data, unit_data, option_data
+
+def parse_tournament(tourn):
+    '''Function to parse the metadata and reports of a tournament into tournament, game, list, unit and option data with ids starting from zero.'''
+    if not tourn:
+        return tuple(pl.DataFrame(schema=schema) for schema in table_schemas)
+    return organise_tournament(tourn)
+
+def parse_tournament_folder(folder_path):
+    '''Function to parse a tournament folder into tournament, game, list, unit and option data with ids starting from zero.
+
+    This runs in the worker processes of parse_folders, so it has to stay a module level function.
+    '''
+    return parse_tournament(read_tournament(folder_path))
+
+def id_offsets(counts, first_id):
+    '''Function to get the first id of each chunk when chunks with the given numbers of ids are numbered consecutively.'''
+    counts = np.asarray(counts, dtype=np.int64)
+    return first_id + np.cumsum(counts) - counts
+
+def parse_folders(data_dir, folders, next_ids, max_workers=None):
+    '''Function to parse the given tournament folders into new tournament, game, list, unit and option data.
+
+    The folders are parsed in a pool of max_workers processes (all the CPUs by default, or in this
+    process if that is one) and the chunks are numbered in folder order afterwards, so the
+    result does not depend on the number of workers. Inside a Streamlit app the app stands in for the
+    __main__ module that spawned workers import, so every worker would run the app again; there the
+    folders are read and decoded in a pool of max_workers threads instead, and organised in this
+    process in folder order as they arrive.
+
+    Args:
+        data_dir (str): The data directory.
+        folders (dict): The fingerprints of the tournament folders to parse, in order.
+        next_ids (dict): The first free tournament, game, list and unit ids; updated in place.
+        max_workers (int): The number of worker processes, or threads inside a Streamlit app.
+
+    Returns:
+        tuple: The tournament, game, list, unit and option data of the folders and a manifest entry for each folder.
+    '''
+    folder_paths = [os.path.join(data_dir, folder_name) for folder_name in folders]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(folder_paths) <= 1:
+        chunks = [parse_tournament_folder(folder_path) for folder_path in folder_paths]
+    elif get_script_run_ctx(suppress_warning=True) is not None:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunks = [parse_tournament(tourn) for tourn in executor.map(read_tournament, folder_paths)]
+    else:
+        # Polars is not fork safe, so the workers are spawned
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            chunks = list(executor.map(parse_tournament_folder, folder_paths, chunksize=8))
+    if not chunks:
+        chunks = [tuple(pl.DataFrame(schema=schema) for schema in table_schemas)]
+    tournament_chunks, game_chunks, list_chunks, unit_chunks, option_chunks = zip(*chunks)
+
+    # Offsets that turn the ids of each chunk into global ids
+    tournament_counts = [chunk.height for chunk in tournament_chunks]
+    game_counts = [chunk.height for chunk in game_chunks]
+    list_counts = [chunk.height for chunk in list_chunks]
+    unit_counts = [chunk.height for chunk in unit_chunks]
+    option_counts = [chunk.height for chunk in option_chunks]
+    tournament_offsets = id_offsets(tournament_counts, next_ids['tournament'])
+    game_offsets = id_offsets(game_counts, next_ids['game'])
+    list_offsets = id_offsets(list_counts, next_ids['list'])
+    unit_offsets = id_offsets(unit_counts, next_ids['unit'])
+
+    # Assign the global ids in one pass over each frame
+    tournament_data = pl.concat(tournament_chunks).with_columns(
+        pl.col('tournament_id') + pl.Series(np.repeat(tournament_offsets, tournament_counts)),
+    )
+    game_data = pl.concat(game_chunks).with_columns(
+        pl.col('game_id') + pl.Series(np.repeat(game_offsets, game_counts)),
+        pl.col('tournament_id') + pl.Series(np.repeat(tournament_offsets, game_counts)),
+    )
+    list_data = pl.concat(list_chunks).with_columns(
+        pl.col('game_id') + pl.Series(np.repeat(game_offsets, list_counts)),
+        pl.col('list_id') + pl.Series(np.repeat(list_offsets, list_counts)),
+    )
+    unit_data = pl.concat(unit_chunks).with_columns(
+        pl.col('list_id') + pl.Series(np.repeat(list_offsets, unit_counts)),
+        pl.col('unit_id') + pl.Series(np.repeat(unit_offsets, unit_counts)),
+    )
+    option_data = pl.concat(option_chunks).with_columns(
+        pl.col('list_id') + pl.Series(np.repeat(list_offsets, option_counts)),
+        pl.col('unit_id') + pl.Series(np.repeat(unit_offsets, option_counts)),
+    )
+
+    manifest = {
+        folder_name: {
+            'fingerprint': fingerprint,
+            'tournaments': [int(tournament_offset), int(tournament_offset) + tournament_count],
+            'lists': [int(list_offset), int(list_offset) + list_count],
+        }
+        for (folder_name, fingerprint), tournament_offset, tournament_count, list_offset, list_count
+        in zip(folders.items(), tournament_offsets, tournament_counts, list_offsets, list_counts)
+    }
+    next_ids['tournament'] += sum(tournament_counts)
+    next_ids['game'] += sum(game_counts)
+    next_ids['list'] += sum(list_counts)
+    next_ids['unit'] += sum(unit_counts)
+    return tournament_data, game_data, list_data, unit_data, option_data, manifest
+
+def parse_data_folder(data_dir, current_manifest, aliases, max_workers=None):
+    '''Function to parse and organise all the JSON files in the data directory.
+
+    Names are corrected with the alias tables in aliases, which are updated in place with any new names.
+    '''
+    next_ids = {'tournament': 0, 'game': 0, 'list': 0, 'unit': 0}
+    *frames, manifest = parse_folders(data_dir, current_manifest, next_ids, max_workers)
+    tournament_data, game_data, list_data, unit_data, option_data = frames
+
+    # Correct unit and option names
+    unit_data, aliases['unit'] = correct_unit_names(unit_data, list_data, aliases['unit'])
+    option_data, aliases['option'] = correct_option_names(option_data, aliases['option'])
+
+    return tournament_data, game_data, list_data, unit_data, option_data, manifest, next_ids
+
+def update_data(data_dir, snapshot, current_manifest, aliases, max_workers=None):
+    '''Function to bring a snapshot up to date by parsing only the tournament folders that were added or changed.
+
+    New rows get ids following on from the ones already used, and only their names are corrected,
+    using the alias tables in aliases which are updated in place with any new names.
+    '''
+    frames = list(snapshot['frames'])
+    manifest = dict(snapshot['manifest'])
+    next_ids = dict(snapshot['next_ids'])
+
+    stale = [name for name, entry in manifest.items() if current_manifest.get(name) != entry['fingerprint']]
+    fresh = {name: fingerprint for name, fingerprint in current_manifest.items()
+             if name not in manifest or manifest[name]['fingerprint'] != fingerprint}
+
+    # Drop the rows of folders that were removed or changed
+    if stale:
+        stale_entries = [manifest.pop(name) for name in stale]
+        is_stale_tournament = pl.any_horizontal([
+            pl.col('tournament_id').is_between(*entry['tournaments'], closed='left') for entry in stale_entries
+        ])
+        is_stale_list = pl.any_horizontal([
+            pl.col('list_id').is_between(*entry['lists'], closed='left') for entry in stale_entries
+        ])
+        stale_games = frames[1].filter(is_stale_tournament)['game_id'].implode()
+        frames = [
+            frames[0].filter(~is_stale_tournament),
+            frames[1].filter(~is_stale_tournament),
+            frames[2].filter(~pl.col('game_id').is_in(stale_games)),
+            frames[3].filter(~is_stale_list),
+            frames[4].filter(~is_stale_list),
+        ]
+
+    # Parse the folders that were added or changed and append them
+    if fresh:
+        first_new_list = next_ids['list']
+        *new_frames, new_manifest = parse_folders(data_dir, fresh, next_ids, max_workers)
+        manifest.update(new_manifest)
+        frames = [pl.concat([frame, new_frame]) for frame, new_frame in zip(frames, new_frames)]
+
+        # Correct the names of the new rows
+        frames[3], aliases['unit'] = correct_unit_names(frames[3], frames[2], aliases['unit'], first_new_list)
+        frames[4], aliases['option'] = correct_option_names(frames[4], aliases['option'], first_new_list)
+
+    return *frames, manifest, next_ids
+
+# Version of the snapshot layout, bump this whenever the parsed output changes
+# so that snapshots written by older code are never reused
+SNAPSHOT_VERSION = 5
+
+# Names of the frames stored in a snapshot
+snapshot_frames = ('tournament_data', 'game_data', 'list_data', 'unit_data', 'option_data')
+
+def folder_fingerprint(folder_path, extension='.json'):
+    '''Function to fingerprint a folder using the names, sizes and modification times of its files with the given extension.'''
+    digest = hashlib.sha1()
+    if not os.path.isdir(folder_path):
+        return digest.hexdigest()
+    for entry in sorted(os.scandir(folder_path), key=lambda e: e.name):
+        if entry.name.endswith(extension):
+            stat = entry.stat()
+            digest.update(f'{entry.name}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+def file_fingerprint(file_path):
+    '''Function to fingerprint a single file using its name, size and modification time.'''
+    stat = os.stat(file_path)
+    return hashlib.sha1(f'{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode()).hexdigest()
+
+def changed_since(folder_path, time_ns, extension='.json'):
+    '''Function to check whether a folder, or any of its files with the given extension, was modified after a time in nanoseconds.
+
+    Adding or removing a file modifies the folder itself, so this catches removed files as well as new and edited ones.
+    '''
+    if os.stat(folder_path).st_mtime_ns > time_ns:
+        return True
+    return any(entry.name.endswith(extension) and entry.stat().st_mtime_ns > time_ns for entry in os.scandir(folder_path))
+
+def data_manifest(data_dir):
+    '''Function to get a dictionary mapping each tournament folder or packed tournament file in the data directory to its fingerprint.
+
+    A folder that has also been packed is left out, so each tournament is only read once. If the folder
+    changed after it was packed, the packed file is out of date and the folder is read in its place.
+    '''
+    entry_names = sorted(os.listdir(data_dir))
+    packed = set()
+    for entry_name in entry_names:
+        entry_path = os.path.join(data_dir, entry_name)
+        if not (entry_name.endswith(PACKED_SUFFIX) and os.path.isfile(entry_path)):
+            continue
+        folder_name = entry_name[:-len(PACKED_SUFFIX)]
+        folder_path = os.path.join(data_dir, folder_name)
+        if os.path.isdir(folder_path) and changed_since(folder_path, os.stat(entry_path).st_mtime_ns):
+            print(f'{folder_path} changed after it was packed, reading it instead of {entry_name}. Run compact_data.py to pack it again.')
+        else:
+            packed.add(folder_name)
+    manifest = {}
+    for entry_name in entry_names:
+        entry_path = os.path.join(data_dir, entry_name)
+        if entry_name.endswith(PACKED_SUFFIX) and entry_name[:-len(PACKED_SUFFIX)] in packed:
+            manifest[entry_name] = file_fingerprint(entry_path)
+        elif os.path.isdir(entry_path) and entry_name not in packed:
+            manifest[entry_name] = folder_fingerprint(entry_path)
+    return manifest
+
+def dataset_fingerprint(manifest, alias_fingerprint):
+    '''Function to fingerprint the organised data from the fingerprints of the tournaments and alias tables it is built from.'''
+    return hashlib.sha1(orjson.dumps(
+        {'version': SNAPSHOT_VERSION, 'manifest': manifest, 'aliases': alias_fingerprint},
+        option=orjson.OPT_SORT_KEYS,
+    )).hexdigest()
+
+def read_mapped_ipc(path):
+    '''Function to read an Arrow IPC file through a memory map.
+
+    The columns point into the mapped file instead of being copied, so every process reading the
+    same file shares its pages through the OS page cache. Categorical columns are the exception,
+    as their codes are remapped onto the global categories. A mapping stays valid if the file is
+    replaced, since the old file is only removed once it is no longer mapped.
+    '''
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return pl.from_arrow(table, rechunk=False)
+
+def read_snapshot(snapshot_dir):
+    '''Function to read a snapshot of the organised data, returns None if there is no usable snapshot.'''
+    meta_path = os.path.join(snapshot_dir, 'metadata.json')
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'rb') as f:
+            meta = orjson.loads(f.read())
+        if meta.get('version') != SNAPSHOT_VERSION:
+            return None
+        meta['frames'] = [read_mapped_ipc(os.path.join(snapshot_dir, f'{name}.arrow')) for name in snapshot_frames]
+    except (OSError, orjson.JSONDecodeError, pl.exceptions.PolarsError, pa.ArrowException) as e:
+        print(f'Ignoring unreadable snapshot in {snapshot_dir}: {e}')
+        return None
+    return meta
+
+def write_snapshot(snapshot_dir, tournament_data, game_data, list_data, unit_data, option_data, manifest, next_ids,
+                   alias_fingerprint):
+    '''Function to write a snapshot of the organised data so later processes can skip parsing the JSON files.
+
+    Each frame is written as a single record batch so that it can be memory mapped as contiguous columns.
+    Returns True if the snapshot was written.
+    '''
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        # Write each file under a temporary name and move it into place, the metadata goes last
+        # so a reader never sees a manifest alongside partially written frames
+        for name, frame in zip(snapshot_frames, (tournament_data, game_data, list_data, unit_data, option_data)):
+            path = os.path.join(snapshot_dir, f'{name}.arrow')
+            frame.rechunk().write_ipc(path + '.tmp', compression='uncompressed')
+            os.replace(path + '.tmp', path)
+        meta_path = os.path.join(snapshot_dir, 'metadata.json')
+        with open(meta_path + '.tmp', 'wb') as f:
+            f.write(orjson.dumps({
+                'version': SNAPSHOT_VERSION,
+                'manifest': manifest,
+                'next_ids': next_ids,
+                'aliases': alias_fingerprint,
+            }))
+        os.replace(meta_path + '.tmp', meta_path)
+    except OSError as e:
+        print(f'Could not write snapshot to {snapshot_dir}: {e}')
+        return False
+    return True
+
+class Dataset:
+    '''Handle on the organised data and everything precomputed from it at load time.
+
+    The fingerprint changes whenever the data does, so cached functions can take the handle as an
+    underscore argument, which Streamlit does not hash, and key on the fingerprint instead.
+    '''
+
+    def __init__(self, fingerprint, tournament_data, game_data, list_data, unit_data, option_data):
+        self.fingerprint = fingerprint
+        self.tournament_data = tournament_data
+        self.game_data = game_data
+        self.list_data = list_data
+        self.unit_data = unit_data
+        self.option_data = classify_options(option_data)
+        self.num_games = game_data.height
+        self.magic_paths = get_magic_paths(self.option_data)
+
+        # Score totals, and the indexes used to filter them and to gather units and options
+        self.score_cube = build_score_cube(list_data, game_data)
+        self.date_index = build_date_index(self.score_cube, tournament_data)
+        num_lists = list_data['list_id'].max() + 1 if list_data.height else 0
+        self.unit_index = build_row_index(unit_data, num_lists)
+        self.option_index = build_row_index(option_data, num_lists)
+        self.faction_rows = partition_factions(list_data)
+
+        # Bounds of the sidebar sliders and dates, where only tournaments with games count
+        played = tournament_data.filter(pl.col('tournament_id').is_in(game_data['tournament_id'].implode()))
+        self.max_tournament_size = played['Tournament Size'].max()
+        self.max_game_size = game_data['Game Size'].max()
+        self.min_game_size = game_data['Game Size'].min()
+        self.min_start_date = played['Start Date'].min()
+        self.max_end_date = played['End Date'].max()
+
+# Cached function to load and organise the data, cached as a resource so that every session
+# shares the same memory mapped frames instead of getting its own copy
+@st.cache_resource
+def load_and_organise_data(root_folder='data', snapshot_folder='.snapshot', incremental=True, max_workers=None,
+                           alias_folder='aliases'):
+    '''Function to load and organise data from JSON files in the specified root folder.
+
+    Each tournament in the root folder is either a folder of JSON files or a single file packed
+    by compact_data.py.
+
+    The data is returned as a Dataset holding tournament, game, list, unit and option tables,
+    which list_view, unit_view and option_view join back into the columns used by the pages.
+    Alongside them are a cube of the score totals that the pages take counts, means and standard
+    errors from, an index of the totals by date for when the dates are the only filters in use,
+    the row offsets of the lists in the unit and option tables and the bounds of the sidebar filters.
+
+    The organised data is also stored as a snapshot in snapshot_folder, together with a manifest
+    of the tournament folders it was built from. When incremental is True only the folders that
+    were added or changed since the snapshot are parsed, otherwise everything is parsed again.
+    Folders are parsed in max_workers processes, all the CPUs by default, except inside the app where
+    they are parsed in its own process. Running this module builds the snapshot with parallel parsing
+    before the app is started.
+
+    Unit and option names are corrected with the alias tables in alias_folder, which are only read.
+    Names not in them are matched when they are first parsed, and their corrections are kept in an
+    aliases folder of the snapshot so that updates of the snapshot do not match them again. Editing
+    the tables in alias_folder causes the snapshot to be rebuilt.
+    '''
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(script_dir, root_folder)
+    if not os.path.exists(data_dir):
+        raise FileNotFoundError(f'The specified path does not exist: {data_dir}')
+
+    snapshot_dir = os.path.join(script_dir, snapshot_folder)
+    alias_dir = os.path.join(script_dir, alias_folder)
+    learned_alias_dir = os.path.join(snapshot_dir, 'aliases')
+    current_manifest = data_manifest(data_dir)
+    alias_fingerprint = folder_fingerprint(alias_dir, '.csv')
+    snapshot = read_snapshot(snapshot_dir) if incremental else None
+    if snapshot is not None and snapshot.get('aliases') != alias_fingerprint:
+        snapshot = None
+
+    if snapshot is not None and current_manifest == {name: entry['fingerprint'] for name, entry in snapshot['manifest'].items()}:
+        data = (*snapshot['frames'], snapshot['manifest'], snapshot['next_ids'])
+    else:
+        unit_aliases, option_aliases = read_aliases(alias_dir)
+        aliases = {'unit': unit_aliases, 'option': option_aliases}
+        if snapshot is None:
+            data = parse_data_folder(data_dir, current_manifest, aliases, max_workers)
+        else:
+            # The names matched while building the snapshot keep their corrections
+            learned_unit_aliases, learned_option_aliases = read_aliases(learned_alias_dir)
+            aliases = {'unit': pl.concat([unit_aliases, learned_unit_aliases]), 'option': pl.concat([option_aliases, learned_option_aliases])}
+            data = update_data(data_dir, snapshot, current_manifest, aliases, max_workers)
+        # Save the names matched since the tracked tables alongside the snapshot, so they are not matched again
+        write_aliases(learned_alias_dir, aliases['unit'][unit_aliases.height:], aliases['option'][option_aliases.height:])
+        # Swap the parsed frames for memory mapped ones so they are shared with other processes
+        if write_snapshot(snapshot_dir, *data, alias_fingerprint):
+            snapshot = read_snapshot(snapshot_dir)
+            if snapshot is not None:
+                data = (*snapshot['frames'], snapshot['manifest'], snapshot['next_ids'])
 
     # Return the data
-    return raw_list_data, raw_unit_data, raw_option_data, num_games, sorted(magic_paths)
+    return Dataset(dataset_fingerprint(current_manifest, alias_fingerprint), *data[:5])
+
+def main():
+    '''Build or update the snapshot of the data folder, parsing the tournament folders in parallel.
+
+    Run from the repository root with:
+        python load_and_organise_data.py [data folder] [--full]
+
+    With --full every folder is parsed again, not just the ones added or changed since the snapshot.
+    '''
+    args = [arg for arg in sys.argv[1:] if arg != '--full']
+    dataset = load_and_organise_data(args[0] if args else 'data', incremental='--full' not in sys.argv[1:])
+    print(f'Organised {dataset.list_data.height} lists from {dataset.tournament_data.height} tournaments')
+
+if __name__ == '__main__':
+    main()
@@ -18,9 +18,27 @@ from matplotlib.ticker import FuncFormatter
 # The faction keys
 from constants import faction_keys
 
+# Collecting the lazy queries of the page and the score statistics of options
+from helper_functions import collect_queries, option_score_stats
+
+
+# Cached by the key of the sidebar filters and the selected factions, so the plot only computes each selection once
+@st.cache_data(max_entries=32, show_spinner=False)
+def path_score_stats(filter_key, factions, _list_data, _option_data):
+    '''Helper function to get the score statistics of the lists of the factions taking each magic path and taking any path.
+
+    Returns:
+        tuple: A dictionary of the number of lists and mean score for each path, and the number of lists, mean score
+            and variance of the scores of the lists taking any path.
+    '''
+    flist_data = _list_data.filter(pl.col('Faction').is_in(factions)) if len(factions) != len(faction_keys) else _list_data
+    path_stats = option_score_stats(flist_data, _option_data)
+    any_path_stats = option_score_stats(flist_data, _option_data.select('list_id', pl.lit('Any').alias('Option Name')))
+    num_games, mean, variance = any_path_stats.row(0)[1:] if any_path_stats.height else (0, None, None)
+    return {path: (num_lists, path_mean) for path, num_lists, path_mean, _ in path_stats.iter_rows()}, (num_games, mean, variance)
 
 @st.fragment()
-def path_performance_plot(list_data, option_data, magic_paths):
+def path_performance_plot(list_data, option_data, magic_paths, filter_key):
     '''Helper function to create a scatterplot of the performance and popularity of magic paths.'''
 
     # Select what factions to include
@@ -35,37 +53,17 @@ def path_performance_plot(list_data, option_data, magic_paths):
     if len(factions) == 0:
         st.warning('Please select at least one faction.')
         return
-    elif len(factions) != len(faction_keys):
-        flist_data = list_data.filter(pl.col('Faction').is_in(factions))
-        path_option_data = option_data.filter((pl.col('Option Type') == 'Path') & (pl.col('list_id').is_in(flist_data['list_id'].implode())))
-    else:
-        flist_data = list_data
-        path_option_data = option_data.filter(pl.col('Option Type') == 'Path')
 
-    # Get magic points
-    path_list_ids = path_option_data.select('list_id').unique().to_series().implode()
-    magic_scores = flist_data.filter(pl.col('list_id').is_in(path_list_ids))['Score']
-    mavg = magic_scores.mean()
+    # The number of lists and mean score of every path at once, and of all the lists taking a path
+    path_stats, (num_games, mavg, mvar) = path_score_stats(filter_key, factions, list_data, option_data)
 
-    if len(path_list_ids[0]) == 0:
+    if num_games == 0:
         st.error('No data available for the selected factions.')
         return
     
-    # For each path, find all unique list_ids where it was taken
-    path_points = []
-    # Make a copy of magic_paths to modify for display
-    fmagic_paths = magic_paths.copy()
-    for i in range(len(magic_paths)-1,-1,-1):
-        spell_list_ids = path_option_data.filter(pl.col('Option Name') == magic_paths[i]).select('list_id').unique().to_series().implode()
-        if len(spell_list_ids[0]) == 0:
-            fmagic_paths.pop(i)
-            continue
-        # Get the scores for these lists
-        scores = flist_data.filter(pl.col('list_id').is_in(spell_list_ids))['Score']
-        path_points.append((len(scores), scores.mean()))
-
-    # Account for the fact the magic_paths were processed in reverse order in tha above loop
-    path_points.reverse()
+    # Keep the paths that were taken, in the order of magic_paths
+    fmagic_paths = [path for path in magic_paths if path in path_stats]
+    path_points = [path_stats[path] for path in fmagic_paths]
 
     if len(path_points) == 0:
         st.error('No data available for the selected factions.')
@@ -76,8 +74,8 @@ def path_performance_plot(list_data, option_data, magic_paths):
         figsize=(8,6), # Matplotlib default
         points=path_points,
         labels=fmagic_paths,
-        num_games=len(magic_scores),
-        variance=magic_scores.var(),
+        num_games=num_games,
+        variance=mvar,
         mean=mavg,
         xlim = (0,30),
         ylim = (8,12)
@@ -173,7 +171,7 @@ def magicalness_plot(list_data):
     st.pyplot(fig)
     plt.close(fig)
 
-def magic_page(list_data, option_data, magic_paths):
+def magic_page(data_view, magic_paths, filter_key):
     st.title('Magic')
 
     # Set styling for plots
@@ -189,29 +187,28 @@ def magic_page(list_data, option_data, magic_paths):
     unsafe_allow_html=True)
 
     # Create the plot
-    # Build a DataFrame with all (Faction, Path) counts in one go
-    # Join list_data and option_data on 'list_id'
-    joined = list_data.join(
-        option_data.filter(pl.col('Option Type') == 'Path'),
-        on='list_id',
-        how='inner'
-    )
+    # Only the paths are needed from the options, and the lists are shared by all the plots
+    list_query = data_view.lazy_lists('list_id', 'Faction', 'Score', 'Magicalness')
+    path_query = data_view.lazy_options('list_id', 'Option Name', 'Option Class').filter(pl.col('Option Class') == 'Path')
 
-    # Group by Faction and Option Name (Path), count occurrences
-    counts_df = (
-        joined
+    # Build a DataFrame with all (Faction, Path) counts in one go
+    # Join the lists and paths on 'list_id', group by Faction and Option Name (Path), count occurrences
+    counts_query = (
+        list_query
+        .join(path_query, on='list_id', how='inner')
         .group_by(['Faction', 'Option Name'])
-        .agg(pl.count().alias('count'))
+        .agg(pl.len().alias('count'))
         .filter(pl.col('Option Name').is_in(magic_paths))
     )
+    counts_df, list_data, option_data = collect_queries('Magic', counts_query, list_query, path_query)
 
     # Pivot so each path is a column, each faction is a row
     pivot_df = (
         counts_df
         .pivot(
-            values='count',
+            on='Option Name',
             index='Faction',
-            columns='Option Name'
+            values='count'
         )
         .fill_null(0)
     )
@@ -262,7 +259,7 @@ def magic_page(list_data, option_data, magic_paths):
     unsafe_allow_html=True)
     
     # Show the plot (in a fragment so widgets don't rerun the whole page)
-    path_performance_plot(list_data, option_data, magic_paths)
+    path_performance_plot(list_data, option_data, magic_paths, filter_key)
 
     # Now add a plot about magicalness
     st.subheader('Magicalness Performance and Popularity')
@@ -18,8 +18,14 @@ from magic import magic_page
 from faction_specific_page import faction_specific_page
 from list_finder import list_finder_page
 
+# Import the cache of filtered data shared by all sessions
+from filter_cache import FilterCache
+
 # Import function to organise and load data
-from load_and_organise_data import load_and_organise_data
+from load_and_organise_data import load_and_organise_data, score_cube_view, sum_score_cube, date_range_totals, classified_option_columns
+
+# Import the views of the lists selected by the filters
+from data_view import DataView
 
 # Import constants
 from constants import faction_keys, faction_names
@@ -37,15 +43,25 @@ st.image('https://bedroombattlefields.com/wp-content/uploads/2021/11/the-ninth-a
 # First load the data into three polars dataframes
 
 
-# Cached function to get the minimum and maximums for sliders
-@st.cache_data
-def get_max_min(raw_list_data):
-    return raw_list_data['Tournament Size'].max(), raw_list_data['Game Size'].max(), raw_list_data['Game Size'].min(), raw_list_data['Start Date'].min(), raw_list_data['End Date'].max()
+# Cached function to get the filtered data cache, a resource so every session shares the same one
+@st.cache_resource
+def get_filter_cache():
+    return FilterCache()
 
-# Get the dataframes and minimum and maximums for sliders
+# Get the dataset, which also holds the minimum and maximums for sliders
 with st.spinner('Loading data...'):
-    raw_list_data, raw_unit_data, raw_option_data, tnum_games, magic_paths = load_and_organise_data()
-    max_tournament_size, max_game_size, min_game_size, min_start_date, max_end_date = get_max_min(raw_list_data)
+    dataset = load_and_organise_data()
+    # A view of every list, which the filters narrow down without copying the data
+    raw_view = DataView(
+        dataset.tournament_data,
+        dataset.game_data,
+        dataset.list_data,
+        dataset.unit_data,
+        dataset.option_data,
+        dataset.unit_index,
+        dataset.option_index,
+        dataset.faction_rows
+    )
 
 # Add a sidebar for filtering and page selection
 with st.sidebar:
@@ -74,7 +90,7 @@ with st.sidebar:
     )
     end_date = st.date_input(
         "Select End Date",
-        value = max_end_date,
+        value = dataset.max_end_date,
         key = "end_date"
     )
 
@@ -130,9 +146,9 @@ with st.sidebar:
         # Minimum and maximum list size slider
         min_list_size, max_list_size = st.slider(
             "Select List Size Range (in points)",
-            min_value=min_game_size,
-            max_value=max_game_size,
-            value=(min_game_size, max_game_size),
+            min_value=dataset.min_game_size,
+            max_value=dataset.max_game_size,
+            value=(dataset.min_game_size, dataset.max_game_size),
             step=1
         )
     else:
@@ -142,8 +158,8 @@ with st.sidebar:
     min_size, max_size = st.slider(
         "Select Tournament Size Range (# of players)",
         min_value=0,
-        max_value=max_tournament_size,
-        value=(0, max_tournament_size),
+        max_value=dataset.max_tournament_size,
+        value=(0, dataset.max_tournament_size),
         step=1
     )
 
@@ -157,9 +173,8 @@ with st.sidebar:
 
     # Now lets apply these filters to the raw data
     def filter_data(
-        raw_list_data,
-        raw_unit_data,
-        raw_option_data,
+        dataset,
+        raw_view,
         start_date,
         end_date,
         select_by_list_size,
@@ -169,39 +184,56 @@ with st.sidebar:
         max_size,
         tournament_type
     ):
+        # The date, size and type filters only need the tournament table
+        filtered_tournament_data = dataset.tournament_data.filter(
+            (pl.col("Start Date") >= datetime.combine(start_date, datetime.min.time())) &
+            (pl.col("End Date") <= datetime.combine(end_date, datetime.max.time())) &
+            (pl.col("Tournament Size") >= min_size) &
+            (pl.col("Tournament Size") <= max_size)
+        )
+        if tournament_type != "Any":
+            filtered_tournament_data = filtered_tournament_data.filter(pl.col("Type") == tournament_type)
+
+        # and the list size filter only needs the game table, or the score cube
+        filtered_game_data = dataset.game_data
+        filtered_score_cube = dataset.score_cube
         if select_by_list_size:
-            filtered_list_data = raw_list_data.filter(
-                (pl.col("Start Date") >= datetime.combine(start_date, datetime.min.time())) &
-                (pl.col("End Date") <= datetime.combine(end_date, datetime.max.time())) &
+            filtered_game_data = filtered_game_data.filter(
                 (pl.col("Game Size") >= min_list_size) &
-                (pl.col("Game Size") <= max_list_size) &
-                (pl.col("Tournament Size") >= min_size) &
-                (pl.col("Tournament Size") <= max_size)
+                (pl.col("Game Size") <= max_list_size)
             )
-        else:
-            filtered_list_data = raw_list_data.filter(
-                (pl.col("Start Date") >= datetime.combine(start_date, datetime.min.time())) &
-                (pl.col("End Date") <= datetime.combine(end_date, datetime.max.time())) &
-                (pl.col("Tournament Size") >= min_size) &
-                (pl.col("Tournament Size") <= max_size)
+            filtered_score_cube = filtered_score_cube.filter(
+                (pl.col("Game Size") >= min_list_size) &
+                (pl.col("Game Size") <= max_list_size)
             )
-        if tournament_type != "Any":
-            filtered_list_data = filtered_list_data.filter(pl.col("Type") == tournament_type)
-
-        # Get the list of valid list IDs after filtering
-        valid_list_ids = filtered_list_data.select(pl.col("list_id")).unique().to_series().implode()
 
-        # Filter unit and option data based on valid list IDs
-        filtered_unit_data = raw_unit_data.filter(pl.col("list_id").is_in(valid_list_ids))
-        filtered_option_data = raw_option_data.filter(pl.col("list_id").is_in(valid_list_ids))
+        # Select the lists of the remaining games, along with their units and options
+        filtered_view = raw_view.select(filtered_game_data, filtered_tournament_data)
+        # The cells of the score cube in the remaining tournaments
+        filtered_score_cube = score_cube_view(filtered_score_cube, filtered_tournament_data).collect()
+        # and the score totals of each faction, opponent and turn, straight from the date index if only the dates are filtered
+        if not select_by_list_size and min_size == 0 and max_size == dataset.max_tournament_size and tournament_type == "Any":
+            filtered_score_totals = date_range_totals(dataset.date_index, start_date, end_date)
+        else:
+            filtered_score_totals = sum_score_cube(filtered_score_cube)
 
-        return filtered_list_data, filtered_unit_data, filtered_option_data, filtered_list_data.height // 2
+        return filtered_view, filtered_score_cube, filtered_score_totals, filtered_view.num_lists // 2
 
-    # Get the filtered data
-    list_data, unit_data, option_data, num_games = filter_data(
-            raw_list_data,
-            raw_unit_data,
-            raw_option_data,
+    # Get the filtered data, from the shared cache if any session has used the same filters on the same data
+    # The list size range is None when unchecked, so the key only depends on the filters in use
+    filter_key = (
+        dataset.fingerprint,
+        start_date,
+        end_date,
+        min_list_size,
+        max_list_size,
+        min_size,
+        max_size,
+        tournament_type,
+    )
+    data_view, score_cube, score_totals, num_games = get_filter_cache().get(filter_key, lambda: filter_data(
+            dataset,
+            raw_view,
             start_date,
             end_date,
             select_by_list_size,
@@ -210,22 +242,28 @@ with st.sidebar:
             min_size,
             max_size,
             tournament_type
-        )
+        ))
+
+    st.caption(f'After applying your filters, there are {num_games} games in the dataset out of a possible {dataset.num_games} games.')
 
-    st.caption(f'After applying your filters, there are {num_games} games in the dataset out of a possible {tnum_games} games.')
+    # Operators can see how well the cache is doing by adding ?cache_stats to the URL
+    if 'cache_stats' in st.query_params:
+        cache_stats = get_filter_cache().stats()
+        st.caption(f'Filter cache: {cache_stats["hits"]} hits, {cache_stats["misses"]} misses, {cache_stats["evictions"]} evictions, \
+                {cache_stats["entries"]} entries using {cache_stats["size_mb"]:.1f} MB.')
 
 # Depending on the selected page, we show the appropriate content
 if page == 'Welcome':
     welcome_page()
 
 elif page == 'Scores & Faction Performance':
-    scores_page(faction_keys, list_data)
+    scores_page(faction_keys, data_view, score_totals, filter_key)
 
 elif page == 'Faction Popularity':
-    popularity_page(tournament_type, faction_keys, list_data, start_date, end_date)
+    popularity_page(tournament_type, faction_keys, data_view, score_totals, score_cube, start_date, end_date, filter_key)
 
 elif page == 'Magic':
-    magic_page(list_data, option_data, magic_paths)
+    magic_page(data_view, dataset.magic_paths, filter_key)
 
 elif page == 'Faction Specific':
     faction_name = st.selectbox('Select a Faction', faction_names, index=None)
@@ -235,16 +273,16 @@ elif page == 'Faction Specific':
     else:
         # Filter data to only include the selected faction
         fkey = faction_keys[ faction_names.index(faction_name) ]
-        flist_data = list_data.filter((pl.col('Faction') == fkey) & (pl.col('List')))
-        valid_list_ids = flist_data.select(pl.col("list_id")).unique().to_series().implode()
-        funit_data = unit_data.filter(pl.col('list_id').is_in(valid_list_ids))
-        foption_data = option_data.filter(pl.col('list_id').is_in(valid_list_ids))
+        faction_view = data_view.faction(fkey).filter(pl.col('List'))
+        flist_data = faction_view.lists('list_id', 'Score', 'Total Points')
+        funit_data = faction_view.units()
+        foption_data = faction_view.options(*classified_option_columns)
         # Display the faction specific page
         # This is a fragment so data won't be resorted on each interaction
         faction_specific_page(faction_name, flist_data, funit_data, foption_data)
 
 elif page == 'List Finder':
-    list_finder_page(faction_keys, magic_paths, list_data, unit_data, option_data)
+    list_finder_page(faction_keys, dataset.magic_paths, data_view)
 
 elif page == 'Raw Data':
     st.title('Raw Data')
@@ -257,7 +295,7 @@ elif page == 'Raw Data':
                 was provided for that entry, or the computation of that entry failed for some reason.
                 You can also download this data as a CSV file by mousing over the top right corner of the table.
                 """)
-    st.write(list_data)
+    st.write(data_view.lists())
 
     st.markdown('##### Unit Data')
     st.markdown('The individual unit data from all the uploaded lists is shown below; \
@@ -265,14 +303,14 @@ elif page == 'Raw Data':
                 Note that the "models" column will display None for units that can not take additional models. \
                 As a reminder, you can use the filters in the sidebar to filter the data. \
                 You can also download this data as a CSV file by mousing over the top right corner of the table.')
-    st.write(unit_data)
+    st.write(data_view.units())
 
     st.markdown('##### Option Data')
     st.markdown('The individual option data from all the uploaded lists is shown below; \
                 the "unit_id" column indicates which unit selected the given option. \
                 As a reminder, you can use the filters in the sidebar to filter the data. \
                 You can also download this data as a CSV file by mousing over the top right corner of the table.')
-    st.write(option_data)
+    st.write(data_view.options())
 
 # Garbage collecting
 gc.collect()
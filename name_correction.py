@@ -0,0 +1,210 @@
+# File handling
+import os
+
+# Data analysis tools
+import polars as pl
+
+# String matching
+import Levenshtein
+from collections import defaultdict
+
+def deletion_keys(name):
+    '''Function to get the deletion neighbourhood of a name: the name itself and every string made by deleting one character.'''
+    return {name} | {name[:k] + name[k+1:] for k in range(len(name))}
+
+def distance_one_pairs(names):
+    '''Function to find every pair of names that are a Levenshtein distance of one apart.
+
+    Two names a single substitution, insertion or deletion apart always share a key in their
+    deletion neighbourhoods, so only names sharing a key are compared rather than every pair.
+
+    Args:
+        names (list): The unique names.
+
+    Returns:
+        list: The pairs of indices (i, j) with i < j, sorted.
+    '''
+    buckets = defaultdict(list)
+    for i, name in enumerate(names):
+        for key in deletion_keys(name):
+            buckets[key].append(i)
+    candidates = set()
+    for indices in buckets.values():
+        for a in range(len(indices)):
+            for b in range(a+1, len(indices)):
+                candidates.add((indices[a], indices[b]))
+    # Sharing a key also happens for transpositions, so check the distance of each candidate
+    return sorted((i, j) for i, j in candidates if Levenshtein.distance(names[i], names[j]) == 1)
+
+def find_name_corrections(names, counts):
+    '''Function to map names to a more popular name that differs by a single character.
+
+    Pairs are visited in the order of the names, so when a name is the less popular of several
+    pairs the last pair wins, and ties go to the name that appeared first.
+
+    Args:
+        names (list): The unique names in order of first appearance.
+        counts (list): The number of times each name appears.
+
+    Returns:
+        dict: A dictionary mapping the less popular name of each pair to the more popular one.
+    '''
+    corrections = {}
+    for i, j in distance_one_pairs(names):
+        popular, less_popular = (names[i], names[j]) if counts[i] >= counts[j] else (names[j], names[i])
+        corrections[less_popular] = popular
+    return corrections
+
+# Alias tables mapping the raw names seen in the data to their corrected names
+unit_alias_schema = {
+    'Faction': pl.Categorical,
+    'Raw Name': pl.Categorical,
+    'Name': pl.Categorical,
+}
+option_alias_schema = {
+    'Unit Name': pl.Categorical,
+    'Raw Option Name': pl.Categorical,
+    'Option Name': pl.Categorical,
+    'Option Type': pl.Categorical,  # Only set when the option name is corrected
+}
+
+def correct_unit_names(unit_data, list_data, unit_aliases, first_new_list=0):
+    '''Function to correct unit names that differ by a single character within the same faction.
+
+    Only the units of lists with a list_id of at least first_new_list are corrected, the others are
+    taken to be corrected already. Raw names found in unit_aliases are mapped with a join, and only
+    the names that are not in it yet are matched against the other names of their faction.
+
+    Returns:
+        tuple: The corrected unit data and the alias table extended with the new names.
+    '''
+    is_new = pl.col('list_id') >= first_new_list
+    # Attach the faction of each unit
+    unit_factions = unit_data.select('list_id', 'Name').join(
+        list_data.select('list_id', 'Faction'), on='list_id', how='left', maintain_order='left'
+    )
+    aliases = unit_aliases.rename({'Name': 'Alias', 'Raw Name': 'Name'})
+    unknown_names = (
+        unit_factions.filter(is_new).select('Faction', 'Name').unique(maintain_order=True)
+        .join(aliases, on=['Faction', 'Name'], how='anti', maintain_order='left')
+    )
+    if not unknown_names.is_empty():
+        # Count unit names by faction in order of first appearance, with the known aliases applied
+        name_counts = (
+            unit_factions
+            .filter(pl.col('Faction').is_in(unknown_names['Faction'].unique().implode()))
+            .join(aliases, on=['Faction', 'Name'], how='left', maintain_order='left')
+            .select('Faction', pl.when(is_new).then(pl.coalesce('Alias', 'Name')).otherwise('Name').alias('Name'))
+            .group_by(['Faction', 'Name'], maintain_order=True).len()
+        )
+        # Find corrections for the unknown names
+        unknown = set(unknown_names.iter_rows())
+        alias_rows = []
+        for (faction,), group in name_counts.group_by('Faction', maintain_order=True):
+            corrections = find_name_corrections(group['Name'].to_list(), group['len'].to_list())
+            alias_rows.extend((faction, name, corrections.get(name, name)) for name in group['Name'] if (faction, name) in unknown)
+        unit_aliases = pl.concat([unit_aliases, pl.DataFrame(alias_rows, schema=unit_alias_schema, orient='row')])
+        aliases = unit_aliases.rename({'Name': 'Alias', 'Raw Name': 'Name'})
+    # Apply corrections
+    corrected_names = (
+        unit_factions
+        .join(aliases, on=['Faction', 'Name'], how='left', maintain_order='left')
+        .select(pl.when(is_new).then(pl.coalesce('Alias', 'Name')).otherwise('Name'))
+        .to_series()
+    )
+    return unit_data.with_columns(corrected_names.alias('Name')), unit_aliases
+
+def correct_option_names(option_data, option_aliases, first_new_list=0):
+    '''Function to correct option names that differ by a single character within the same unit.
+
+    Only the options of lists with a list_id of at least first_new_list are corrected, the others are
+    taken to be corrected already. Raw names found in option_aliases are mapped with a join, and only
+    the names that are not in it yet are matched against the other options of their unit.
+
+    Returns:
+        tuple: The corrected option data and the alias table extended with the new names.
+    '''
+    is_new = pl.col('list_id') >= first_new_list
+    aliases = option_aliases.rename({
+        'Option Name': 'Alias', 'Option Type': 'Alias Type', 'Raw Option Name': 'Option Name'
+    })
+    is_corrected = is_new & pl.col('Alias').is_not_null() & (pl.col('Alias') != pl.col('Option Name'))
+    unknown_names = (
+        option_data.filter(is_new).select('Unit Name', 'Option Name').unique(maintain_order=True)
+        .join(aliases, on=['Unit Name', 'Option Name'], how='anti', maintain_order='left')
+    )
+    if not unknown_names.is_empty():
+        # Options of the units with unknown names, with the known aliases applied
+        known_options = (
+            option_data.select('list_id', 'Unit Name', 'Option Name', 'Option Type')
+            .filter(pl.col('Unit Name').is_in(unknown_names['Unit Name'].unique().implode()))
+            .join(aliases, on=['Unit Name', 'Option Name'], how='left', maintain_order='left')
+            .select(
+                'Unit Name',
+                pl.when(is_corrected).then(pl.col('Alias')).otherwise(pl.col('Option Name')).alias('Option Name'),
+                pl.when(is_corrected).then(pl.col('Alias Type')).otherwise(pl.col('Option Type')).alias('Option Type'),
+            )
+        )
+        # Count option names by Unit Name in order of first appearance
+        option_counts = known_options.group_by(['Unit Name', 'Option Name'], maintain_order=True).len()
+        # Find corrections for the unknown names
+        unknown = set(unknown_names.iter_rows())
+        alias_rows = []
+        for (unit_name,), group in option_counts.group_by('Unit Name', maintain_order=True):
+            corrections = find_name_corrections(group['Option Name'].to_list(), group['len'].to_list())
+            alias_rows.extend(
+                (unit_name, name, corrections.get(name, name)) for name in group['Option Name'] if (unit_name, name) in unknown
+            )
+        new_aliases = pl.DataFrame(
+            alias_rows,
+            schema={name: dtype for name, dtype in option_alias_schema.items() if name != 'Option Type'},
+            orient='row'
+        )
+        # Find the most common Option Type for each corrected name, ties go to the type seen first
+        corrected_types = (
+            known_options
+            .join(
+                new_aliases.filter(pl.col('Option Name') != pl.col('Raw Option Name')).select('Unit Name', 'Option Name'),
+                on=['Unit Name', 'Option Name'],
+                how='semi'
+            )
+            .group_by(['Unit Name', 'Option Name', 'Option Type'], maintain_order=True).len()
+            .sort('len', descending=True, maintain_order=True)
+            .group_by(['Unit Name', 'Option Name'], maintain_order=True).first()
+            .drop('len')
+        )
+        new_aliases = new_aliases.join(corrected_types, on=['Unit Name', 'Option Name'], how='left', maintain_order='left').with_columns(
+            pl.when(pl.col('Option Name') != pl.col('Raw Option Name')).then(pl.col('Option Type')).alias('Option Type')
+        )
+        option_aliases = pl.concat([option_aliases, new_aliases])
+        aliases = option_aliases.rename({
+            'Option Name': 'Alias', 'Option Type': 'Alias Type', 'Raw Option Name': 'Option Name'
+        })
+    # Update Option Name and Option Type to match the most popular variant
+    corrected = option_data.select('list_id', 'Unit Name', 'Option Name', 'Option Type').join(
+        aliases, on=['Unit Name', 'Option Name'], how='left', maintain_order='left'
+    ).select(
+        pl.when(is_corrected).then(pl.col('Alias')).otherwise(pl.col('Option Name')).alias('Option Name'),
+        pl.when(is_corrected).then(pl.col('Alias Type')).otherwise(pl.col('Option Type')).alias('Option Type'),
+    )
+    return option_data.with_columns(corrected['Option Name'], corrected['Option Type']), option_aliases
+
+# Alias table files
+alias_files = {'unit_aliases.csv': unit_alias_schema, 'option_aliases.csv': option_alias_schema}
+
+def read_aliases(alias_dir):
+    '''Function to read the unit and option alias tables, tables that do not exist yet are returned empty.'''
+    tables = []
+    for file_name, schema in alias_files.items():
+        path = os.path.join(alias_dir, file_name)
+        tables.append(pl.read_csv(path, schema=schema) if os.path.exists(path) else pl.DataFrame(schema=schema))
+    return tables
+
+def write_aliases(alias_dir, unit_aliases, option_aliases):
+    '''Function to write the unit and option alias tables, sorted so that changes are easy to review.'''
+    try:
+        os.makedirs(alias_dir, exist_ok=True)
+        for file_name, table in zip(alias_files, (unit_aliases, option_aliases)):
+            table.sort(table.columns[:2]).write_csv(os.path.join(alias_dir, file_name))
+    except OSError as e:
+        print(f'Could not write alias tables to {alias_dir}: {e}')
@@ -10,15 +10,167 @@ import polars as pl
 import pandas as pd
 import numpy as np
 import scipy.stats as stats
+from scipy.stats import t
 
 # Import helper function
-from helper_functions import colourmap, round_sig
+from helper_functions import colourmap, colourmap_array, round_sig, mean_sem_array, binned_counts
+
+def group_totals(score_totals, *keys):
+    '''Function to sum the score totals over everything but the given keys, returning the number of lists,
+    sum of scores and sum of squared scores for each combination of the keys.'''
+    totals = score_totals.group_by(*keys).agg(pl.col('Lists', 'Score Sum', 'Score Squared Sum').sum())
+    return {row[:len(keys)]: row[len(keys):] for row in totals.iter_rows()}
+
+def matchup_stats(list_data, factions):
+    '''Function to compute the statistics of every entry of the matchup table from the scores of the lists.
+
+    The rows are All, First, Second and then each faction as the opponent, and the columns are the factions.
+    The lists are sorted once for each kind of row, so the scores of every entry are a block, and the means
+    and standard errors of all the blocks are summed at once. The means are exactly np.mean of each block, as
+    the scores are integers, but the standard errors can differ from stats.sem in the last bits, so entries
+    whose shown error would change within a relative 1e-12 of theirs are taken with stats.sem of the block.
+
+    Returns:
+        tuple: Arrays of the number of lists, mean score and standard error of the mean of each entry.
+    '''
+    num_factions = len(factions)
+    shape = (3 + num_factions, num_factions)
+    count = np.zeros(shape, dtype=np.int64)
+    mean = np.zeros(shape)
+    sem = np.zeros(shape)
+    if list_data.height == 0:
+        return count, mean, sem
+    # Factions, opponents and turns that are not in the table go to -1
+    faction, opponent, turn = list_data.select(
+        pl.col('Faction').cast(pl.String).replace_strict(factions, list(range(num_factions)), default=-1, return_dtype=pl.Int64),
+        pl.col('Opponent').cast(pl.String).replace_strict(factions, list(range(num_factions)), default=-1, return_dtype=pl.Int64),
+        pl.col('Turn').cast(pl.String).replace_strict(['First', 'Second'], [1, 2], default=-1, return_dtype=pl.Int64),
+    ).to_numpy().T
+    score = list_data['Score'].to_numpy()
+
+    # The entry of each list in the All row, the turn rows and the opponent rows, or -1 for none
+    all_row = np.where(faction >= 0, faction, -1)
+    turn_row = np.where((faction >= 0) & (turn >= 0), turn * num_factions + faction, -1)
+    opponent_row = np.where((faction >= 0) & (opponent >= 0) & (faction != opponent), (3 + opponent) * num_factions + faction, -1)
+    for entry in (all_row, turn_row, opponent_row):
+        order = np.argsort(entry, kind='stable')
+        entry, entry_score = entry[order], score[order].astype(np.float64)
+        first = np.searchsorted(entry, 0)
+        if first == len(entry):
+            continue
+        entry, entry_score = entry[first:], entry_score[first:]
+        starts = np.flatnonzero(np.r_[True, entry[1:] != entry[:-1]])
+        n = np.diff(np.r_[starts, len(entry)])
+        block_mean = np.add.reduceat(entry_score, starts) / n
+        squared_deviation = np.add.reduceat((entry_score - np.repeat(block_mean, n)) ** 2, starts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block_sem = np.where(n > 1, np.sqrt(squared_deviation / (n - 1)) / np.sqrt(n), 0)
+        for k in np.flatnonzero(n > 1).tolist():
+            if round_sig(block_mean[k], block_sem[k] * (1 - 1e-12)) != round_sig(block_mean[k], block_sem[k] * (1 + 1e-12)):
+                block_sem[k] = stats.sem(entry_score[starts[k]:starts[k] + n[k]])
+        i, j = np.divmod(entry[starts], num_factions)
+        count[i, j], mean[i, j], sem[i, j] = n, block_mean, block_sem
+    return count, mean, sem
+
+def matchup_table_df(list_data, factions):
+    '''Function to build the matchup table, with entries formatted as mean±standard error, and an array of the text colour of each entry.'''
+    count, mean, sem = matchup_stats(list_data, factions)
+    cells = np.full(count.shape, '', dtype=object)
+    # The rounded means and errors the entries show, which the colours are computed from
+    shown_mean = np.full(count.shape, np.nan)
+    shown_sem = np.full(count.shape, np.nan)
+    rows, cols = np.nonzero(count)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        if sem[i, j] < 1e-6:
+            cells[i, j] = f'{int(mean[i, j])}'
+            continue
+        m, e = round_sig(mean[i, j], sem[i, j])
+        cells[i, j] = f'{m}±{e}'
+        shown_mean[i, j], shown_sem[i, j] = m, e
+    # Mirror matchups
+    mirror = np.eye(len(factions), dtype=bool)
+    cells[3:][mirror] = '-'
+    shown_mean[3:][mirror] = np.nan
+
+    # Colour the entries by how many errors the mean is from 10 points
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = np.where(shown_sem != 0, (shown_mean - 10) / shown_sem, 0)
+    colours = np.array(colourmap_array(np.nan_to_num(z_score)), dtype=object).reshape(count.shape)
+    styles = np.where(np.isnan(shown_mean), '', 'color: ' + colours)
+
+    return pd.DataFrame(cells, columns=factions, index=['All', 'First', 'Second', *factions]), styles
+
+def faction_score_stats(score_totals, factions):
+    '''Function to get the number of lists, mean score and standard error of the mean of each faction, excluding mirror matchups.'''
+    totals = group_totals(score_totals.filter(pl.col('Faction') != pl.col('Opponent')), 'Faction')
+    count, total, squared_total = np.array([totals.get((fac,), (0, 0, 0)) for fac in factions], dtype=np.int64).reshape(-1, 3).T
+    mean, sem = mean_sem_array(count, total, squared_total)
+    return count, mean, sem
+
+# Turns of the score distribution and the scores it counts
+score_turns = ['First', 'Second', 'Unknown']
+scores = list(range(21))
+
+# Cached by the key of the sidebar filters, so changing the selections on the page only sums the counts
+@st.cache_data(max_entries=16, show_spinner=False)
+def score_counts(filter_key, _data_view, factions):
+    '''Function to count the filtered lists by faction, turn, whether the matchup is a mirror and score.
+
+    Returns:
+        np.ndarray: The counts from binned_counts, indexed by faction, turn, mirror matchup and score, each with a last bin for other values.
+    '''
+    return binned_counts(_data_view.lazy_lists('Faction', 'Opponent', 'Turn', 'Score'), [
+        (pl.col('Faction'), factions),
+        (pl.col('Turn'), score_turns),
+        (pl.col('Faction') == pl.col('Opponent'), [False, True]),
+        (pl.col('Score'), scores),
+    ], label='Score distribution')
+
+# Cached so that moving the confidence interval slider only takes new percentiles of the same resamples
+@st.cache_data(max_entries=16, show_spinner=False)
+def bootstrap_means(histograms, num_resamples=1000, seed=0):
+    '''Function to bootstrap the mean score of each faction.
+
+    The scores are whole numbers, so resampling the lists of a faction is the same as drawing its histogram
+    of scores from a multinomial distribution, which is done for every faction and resample at once.
+
+    Args:
+        histograms (np.ndarray): The number of lists of each faction (rows) with each score (columns).
+        num_resamples (int): The number of resamples of each faction.
+        seed (int): The seed of the random number generator, so the intervals do not change between runs.
+
+    Returns:
+        np.ndarray: The mean score of every resample, with a row per faction, which are nan for factions without lists.
+    '''
+    rng = np.random.default_rng(seed)
+    count = histograms.sum(axis=1)
+    # Factions without lists are given any valid probabilities, as nothing is drawn for them
+    probabilities = np.where(count[:, None] > 0, histograms / np.maximum(count, 1)[:, None], 1 / histograms.shape[1])
+    resamples = rng.multinomial(count, probabilities, size=(num_resamples, len(histograms)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (resamples @ np.arange(histograms.shape[1]) / count).T
+
+def faction_error_bars(counts, score_totals, faction_keys, confidence_interval, bootstrap=False):
+    '''Function to get the mean score of each faction and its error bars for the given confidence interval, in percent.
+
+    The error bars come from the t distribution, or from percentiles of the bootstrapped means if bootstrap is set.
+
+    Returns:
+        tuple: The means and the errors, either one array for both sides or a lower and an upper array.
+    '''
+    count, mean, sem = faction_score_stats(score_totals, faction_keys)
+    if bootstrap:
+        # The scores of each faction's lists outside mirror matchups, over every turn
+        means = bootstrap_means(counts[:len(faction_keys), :, 0, :len(scores)].sum(axis=1))
+        lower, upper = np.percentile(means, [50 - confidence_interval / 2, 50 + confidence_interval / 2], axis=1)
+        return mean, [mean - lower, upper - mean]
+    # Factions with a single list get no error bar
+    with np.errstate(invalid='ignore'):
+        return mean, t.ppf(0.5 + confidence_interval / 200, count - 1) * sem
 
 @st.fragment()
-def show_faction_scores(list_data, faction_keys):
+def show_faction_scores(counts, score_totals, faction_keys):
     ''' A fragment to show the average scores of each faction with error bars '''
-    no_mirror_list_data = list_data.filter(pl.col('Faction') != pl.col('Opponent'))
-
     confidence_interval = st.slider('Confidence Interval for Error Bars', 
                                     min_value=50.0, 
                                     max_value=99.9, 
@@ -27,17 +179,14 @@ def show_faction_scores(list_data, faction_keys):
                                     format="%.1f%%",
                                     key='faction_performance_ci'
                                     )
+    bootstrap = st.toggle('Bootstrap the Error Bars', value=False, key='faction_performance_bootstrap',
+                          help='Use percentiles of 1000 resamples of the lists of each faction instead of the t distribution')
+
+    mean, error = faction_error_bars(counts, score_totals, faction_keys, confidence_interval, bootstrap)
 
     fig,ax = plt.subplots(layout="constrained")
 
-    sns.pointplot(data=no_mirror_list_data.to_pandas(), 
-                  x='Faction', 
-                  order=faction_keys, 
-                  y='Score', 
-                  linestyle='none', 
-                  ax=ax, 
-                  errorbar=('ci', confidence_interval)
-                  )
+    ax.errorbar(faction_keys, mean, yerr=error, fmt='o', linestyle='none', color='C0')
     
     plt.axhline(y=10, linestyle='--')
     plt.title('Average Score of Each Faction')
@@ -50,7 +199,7 @@ def show_faction_scores(list_data, faction_keys):
     plt.close(fig)
 
 @st.fragment()
-def show_score_distribution(list_data, first_data, second_data, faction_keys):
+def show_score_distribution(counts, faction_keys):
     ''' A fragment to show the distribution of scores '''
 
     # Add a multiselect to choose which factions to include
@@ -62,33 +211,21 @@ def show_score_distribution(list_data, first_data, second_data, faction_keys):
         st.warning('Please select at least one faction to display the score distribution.')
         return
 
-    scores = list(range(21))
-    if len(selected_factions) == len(faction_keys) and turn_separate:
-        first_counts = [first_data.filter(pl.col('Score') == i).height for i in scores]
-        second_counts = [second_data.filter(pl.col('Score') == i).height for i in scores]
-        unknown_counts = [list_data.filter((pl.col('Score') == i) & (pl.col('Turn') == 'Unknown')).height for i in scores]
-        bar_data = pd.DataFrame({
-            'Number of Games': first_counts + second_counts + unknown_counts,
-            'Score': scores * 3,
-            'Turn': ['First'] * 21 + ['Second'] * 21 + ['Unknown'] * 21
-        })
-    elif turn_separate:
-        first_counts = [first_data.filter((pl.col('Score') == i) & (pl.col('Faction').is_in(selected_factions))).height for i in scores]
-        second_counts = [second_data.filter((pl.col('Score') == i) & (pl.col('Faction').is_in(selected_factions))).height for i in scores]
-        unknown_counts = [list_data.filter((pl.col('Score') == i) & (pl.col('Turn') == 'Unknown') & (pl.col('Faction').is_in(selected_factions))).height for i in scores]
+    # Sum the counts of the selected factions, where selecting every faction includes any others as well
+    if len(selected_factions) == len(faction_keys):
+        selected_counts = counts.sum(axis=(0, 2))
+    else:
+        selected_counts = counts[[faction_keys.index(fac) for fac in selected_factions]].sum(axis=(0, 2))
+
+    if turn_separate:
         bar_data = pd.DataFrame({
-            'Number of Games': first_counts + second_counts + unknown_counts,
-            'Score': scores * 3,
-            'Turn': ['First'] * 21 + ['Second'] * 21 + ['Unknown'] * 21
+            'Number of Games': selected_counts[:len(score_turns), :len(scores)].ravel(),
+            'Score': scores * len(score_turns),
+            'Turn': [turn for turn in score_turns for _ in scores]
         })
-
     else:
-        if len(selected_factions) == len(faction_keys):
-            counts = [list_data.filter(pl.col('Score') == i).height for i in scores]
-        else:
-            counts = [list_data.filter((pl.col('Score') == i) & (pl.col('Faction').is_in(selected_factions))).height for i in scores]
         bar_data = pd.DataFrame({
-            'Number of Games': counts,
+            'Number of Games': selected_counts[:, :len(scores)].sum(axis=0),
             'Score': scores
         })
 
@@ -106,8 +243,9 @@ def show_score_distribution(list_data, first_data, second_data, faction_keys):
     plt.close(fig)
 
 # Main function of this document
-def scores_page(faction_keys, list_data):
+def scores_page(faction_keys, data_view, score_totals, filter_key):
     ''' The content of the scores & performance page '''
+    counts = score_counts(filter_key, data_view, faction_keys)
     num_faction = len(faction_keys) # Should be 16
     # Set styling for plots
     sns.set_theme()
@@ -116,11 +254,12 @@ def scores_page(faction_keys, list_data):
     # The title of the page
     st.title('Scores & Performance')
 
-    # Some basic filtering and computations; first about turn order then removing mirror matchups
-    first_data = list_data.filter(pl.col('Turn') == 'First')
-    second_data = list_data.filter(pl.col('Turn') == 'Second')
-    fa, fe = round_sig(first_data['Score'].mean(), first_data['Score'].std() / (first_data.height ** 0.5))
-    sa, se = round_sig(second_data['Score'].mean(), second_data['Score'].std() / (second_data.height ** 0.5))
+    # The average scores going first and second
+    list_data = data_view.lists('Faction', 'Opponent', 'Turn', 'Score')
+    first_scores = list_data.filter(pl.col('Turn') == 'First')['Score']
+    second_scores = list_data.filter(pl.col('Turn') == 'Second')['Score']
+    fa, fe = round_sig(first_scores.mean(), first_scores.std() / (first_scores.len() ** 0.5))
+    sa, se = round_sig(second_scores.mean(), second_scores.std() / (second_scores.len() ** 0.5))
 
     # To start with, let's just show a basic scatter plot of faction performance
     st.subheader('Faction Performance')
@@ -132,7 +271,7 @@ def scores_page(faction_keys, list_data):
             95% confidence intervals, even if balance is theoretically "perfect".</p>', unsafe_allow_html=True)
 
     # Show the plot in a fragment so it doesn't reload the whole page on interaction
-    show_faction_scores(list_data, faction_keys)
+    show_faction_scores(counts, score_totals, faction_keys)
 
     # Now let's look at the distribution of scores when going first and second
     st.subheader('Score Distribution')
@@ -144,7 +283,7 @@ def scores_page(faction_keys, list_data):
             )
 
     # Show the plot in a fragment so it doesn't reload the whole page on interaction
-    show_score_distribution(list_data, first_data, second_data, faction_keys)
+    show_score_distribution(counts, faction_keys)
 
     st.subheader('Matchup Performance Table')
 
@@ -165,102 +304,6 @@ def scores_page(faction_keys, list_data):
                 unsafe_allow_html=True
                 )
 
-    # Now we will generate a table with various performance data
-    # Create a matchup table: columns = factions, rows = factions, entries = 'mean±standard error'
-    def matchup_table_df(list_data, first_data, second_data, factions):
-        # Build the table as a DataFrame
-        rows = []
-        index = []
-        # All row
-        all_row = []
-        for fac in factions:
-            scores = list_data.filter(pl.col('Faction') == fac)['Score'].to_list()
-            if len(scores) == 0:
-                cell = ''
-            else:
-                mean = np.mean(scores)
-                sem = stats.sem(scores) if len(scores) > 1 else 0
-                if sem < 1e-6:
-                    cell = f'{int(mean)}'
-                else:
-                    mean, sem = round_sig(mean, sem)
-                    cell = f'{mean}±{sem}'
-            all_row.append(cell)
-        rows.append(all_row)
-        index.append('All')
-        # First row
-        first_row = []
-        for fac in factions:
-            scores = first_data.filter(pl.col('Faction') == fac)['Score'].to_list()
-            if len(scores) == 0:
-                cell = ''
-            else:
-                mean = np.mean(scores)
-                sem = stats.sem(scores) if len(scores) > 1 else 0
-                if sem < 1e-6:
-                    cell = f'{int(mean)}'
-                else:
-                    mean, sem = round_sig(mean, sem)
-                    cell = f'{mean}±{sem}'
-            first_row.append(cell)
-        rows.append(first_row)
-        index.append('First')
-        # Second row
-        second_row = []
-        for fac in factions:
-            scores = second_data.filter(pl.col('Faction') == fac)['Score'].to_list()
-            if len(scores) == 0:
-                    cell = ''
-            else:
-                mean = np.mean(scores)
-                sem = stats.sem(scores) if len(scores) > 1 else 0
-                if sem < 1e-6:
-                    cell = f'{int(mean)}'
-                else:
-                    mean, sem = round_sig(mean, sem)
-                    cell = f'{mean}±{sem}'
-            second_row.append(cell)
-        rows.append(second_row)
-        index.append('Second')
-        # Matchup rows
-        for opp in factions:
-            matchup_row = []
-            for fac in factions:
-                if fac == opp:
-                    matchup_row.append('-')
-                    continue
-                scores = list_data.filter((pl.col('Faction') == fac) & (pl.col('Opponent') == opp))['Score'].to_list()
-                if len(scores) == 0:
-                    cell = ''
-                else:
-                    mean = np.mean(scores)
-                    sem = stats.sem(scores) if len(scores) > 1 else 0
-                    if sem < 1e-6:
-                        cell = f'{int(mean)}'
-                    else:
-                        mean, sem = round_sig(mean, sem)
-                        cell = f'{mean}±{sem}'
-                matchup_row.append(cell)
-            rows.append(matchup_row)
-            index.append(opp)
-        df = pd.DataFrame(rows, columns=factions, index=index)
-        return df
-
-    # Function to colour the table cells based on z-score
-    def colour_matchup(val):
-        if val in ('', '-'): return ''
-        try:
-            mean, sem = val.split('±')
-            mean = float(mean)
-            sem = float(sem)
-            z_score = (mean - 10) / sem if sem else 0
-            colour = colourmap(z_score)
-            return f'color: {colour}'
-        except:
-            return ''
-
     # Show the table
-    matchup_df = matchup_table_df(list_data, first_data, second_data, faction_keys)
-    st.write(matchup_df.style.map(colour_matchup))
-
-
+    matchup_df, matchup_styles = matchup_table_df(list_data, faction_keys)
+    st.write(matchup_df.style.apply(lambda _: matchup_styles, axis=None))
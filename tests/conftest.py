@@ -0,0 +1,104 @@
+# Make the app modules importable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# File handling
+import shutil
+
+# Dates and times
+from datetime import date, datetime
+
+import pytest
+import polars as pl
+
+from load_and_organise_data import load_and_organise_data, list_view, score_cube_view, sum_score_cube, date_range_totals
+from data_view import DataView
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tournament_folders = sorted(os.listdir(os.path.join(repo_dir, 'data')))
+
+def copy_tournaments(data_dir, folder_names):
+    '''Copy tournament folders of the repository's data folder into data_dir.'''
+    os.makedirs(data_dir, exist_ok=True)
+    for folder_name in folder_names:
+        shutil.copytree(os.path.join(repo_dir, 'data', folder_name), os.path.join(data_dir, folder_name))
+
+def load(data_dir, snapshot_dir, alias_dir, **kwargs):
+    '''Load and organise a data folder, without the resource cache that would return the first load every time.'''
+    return load_and_organise_data.__wrapped__(str(data_dir), str(snapshot_dir), alias_folder=str(alias_dir), **kwargs)
+
+@pytest.fixture
+def data_dir(tmp_path):
+    '''A data folder with a few of the tournaments.'''
+    copy_tournaments(tmp_path / 'data', tournament_folders[:6])
+    return tmp_path / 'data'
+
+@pytest.fixture
+def alias_dir(tmp_path):
+    '''A copy of the tracked alias tables.'''
+    return shutil.copytree(os.path.join(repo_dir, 'aliases'), tmp_path / 'aliases')
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    '''Every tournament in the repository, organised in a temporary snapshot.'''
+    tmp_path = tmp_path_factory.mktemp('dataset')
+    alias_dir = shutil.copytree(os.path.join(repo_dir, 'aliases'), tmp_path / 'aliases')
+    return load(os.path.join(repo_dir, 'data'), tmp_path / 'snapshot', alias_dir)
+
+@pytest.fixture(scope='session')
+def raw_view(dataset):
+    '''A view of every list, as the app builds it.'''
+    return DataView(
+        dataset.tournament_data,
+        dataset.game_data,
+        dataset.list_data,
+        dataset.unit_data,
+        dataset.option_data,
+        dataset.unit_index,
+        dataset.option_index,
+        dataset.faction_rows
+    )
+
+# Sidebar filters of the dates and tournament type, including ones where matchup entries are easily rounded differently
+selections = {
+    'all': (None, None, 'Any'),
+    'since 2025': (date(2025, 1, 1), None, 'Any'),
+    'one month': (date(2025, 3, 1), date(2025, 3, 31), 'Any'),
+    'ten days': (date(2025, 3, 10), date(2025, 3, 20), 'Any'),
+    'teams': (date(2024, 1, 1), date(2026, 6, 30), 'Teams'),
+    'singles': (date(2023, 1, 1), None, 'Singles'),
+    'empty': (date(2025, 3, 20), date(2025, 3, 10), 'Any'),
+}
+
+def select_data(dataset, raw_view, start_date, end_date, tournament_type):
+    '''Filter the data as the sidebar of the app does, without a list size filter.
+
+    Returns:
+        tuple: The filtered lists as the pages were first given them, the view, score cube and score totals the pages
+        are now given, the dates and the key of the filters.
+    '''
+    start_date = start_date or dataset.min_start_date
+    end_date = end_date or dataset.max_end_date
+    tournament_data = dataset.tournament_data.filter(
+        (pl.col('Start Date') >= datetime.combine(start_date, datetime.min.time())) &
+        (pl.col('End Date') <= datetime.combine(end_date, datetime.max.time())) &
+        (pl.col('Tournament Size') >= 0) &
+        (pl.col('Tournament Size') <= dataset.max_tournament_size)
+    )
+    if tournament_type != 'Any':
+        tournament_data = tournament_data.filter(pl.col('Type') == tournament_type)
+    list_data = list_view(dataset.list_data, dataset.game_data, tournament_data).collect()
+    data_view = raw_view.select(dataset.game_data, tournament_data)
+    score_cube = score_cube_view(dataset.score_cube, tournament_data).collect()
+    if tournament_type == 'Any':
+        score_totals = date_range_totals(dataset.date_index, start_date, end_date)
+    else:
+        score_totals = sum_score_cube(score_cube)
+    filter_key = (dataset.fingerprint, start_date, end_date, tournament_type)
+    return list_data, data_view, score_cube, score_totals, start_date, end_date, filter_key
+
+@pytest.fixture(scope='session', params=list(selections))
+def selection(request, dataset, raw_view):
+    '''The data of each of the selections.'''
+    return select_data(dataset, raw_view, *selections[request.param])
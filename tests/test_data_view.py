@@ -0,0 +1,48 @@
+import polars as pl
+import pytest
+
+from polars.testing import assert_frame_equal
+
+from load_and_organise_data import unit_columns, option_columns
+from constants import faction_keys
+
+# The views of the pages against filtering the list, unit and option tables directly
+
+def children(child_data, list_data, columns):
+    return (
+        child_data
+        .filter(pl.col('list_id').is_in(list_data['list_id'].implode()))
+        .join(list_data.select('list_id', 'Score'), on='list_id', how='inner', maintain_order='left')
+        .select(columns)
+    )
+
+def assert_view_matches(view, dataset, list_data):
+    assert view.num_lists == list_data.height
+    assert_frame_equal(view.lists(), list_data)
+    assert_frame_equal(view.lazy_lists().collect(), list_data)
+    assert_frame_equal(view.lists('Faction', 'Score', 'Type'), list_data.select('Faction', 'Score', 'Type'))
+    units = children(dataset.unit_data, list_data, unit_columns)
+    options = children(dataset.option_data, list_data, option_columns)
+    assert_frame_equal(view.units(), units)
+    assert_frame_equal(view.lazy_units().collect(), units)
+    assert_frame_equal(view.options(), options)
+    assert_frame_equal(view.lazy_options().collect(), options)
+    assert_frame_equal(view.options('Option Name', 'Score'), options.select('Option Name', 'Score'))
+
+@pytest.mark.parametrize('predicate', [
+    pl.col('Score') >= 13,
+    (pl.col('Turn') == 'First') & (pl.col('Faction') == pl.col('Opponent')),
+    pl.col('Type') == 'Teams',
+    pl.col('Score') > 20,
+], ids=['score', 'turn and mirror', 'tournament type', 'none'])
+def test_filter_matches_polars(dataset, selection, predicate):
+    list_data, data_view, *_ = selection
+    assert_view_matches(data_view.filter(predicate), dataset, list_data.filter(predicate))
+
+@pytest.mark.parametrize('faction', [faction_keys[0], faction_keys[7], 'Not a faction'])
+def test_faction_matches_polars(dataset, selection, faction):
+    list_data, data_view, *_ = selection
+    assert_view_matches(data_view.faction(faction), dataset, list_data.filter(pl.col('Faction') == faction))
+    # A faction of a filtered view is the same as filtering the faction
+    view = data_view.filter(pl.col('Score') >= 10).faction(faction)
+    assert_frame_equal(view.lists(), list_data.filter((pl.col('Score') >= 10) & (pl.col('Faction') == faction)))
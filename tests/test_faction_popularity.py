@@ -0,0 +1,75 @@
+import polars as pl
+import pandas as pd
+import numpy as np
+import pytest
+
+from faction_popularity import split_counts, pairing_percentages
+from constants import faction_keys
+
+# The splits of the faction popularity page, counted as the page counts them from the data it is given
+# and as the page first counted them, filtering the lists for every faction and value of the split
+
+def baseline_counts(list_data, conditions):
+    return np.array(
+        [[list_data.filter((pl.col('Faction') == fac) & condition).height for fac in faction_keys] for condition in conditions],
+        dtype=np.int64
+    ).reshape(len(conditions), len(faction_keys))
+
+def baseline_conditions(bar_stack, list_data, labels, start_date, end_date):
+    if bar_stack == 'No Split':
+        return [pl.lit(True)]
+    elif bar_stack == 'By Turn':
+        return [pl.col('Turn') == turn for turn in labels]
+    elif bar_stack == 'By Opponent Faction':
+        assert sorted(labels) == sorted(list_data.select('Opponent').unique().to_series().to_list())
+        return [pl.col('Opponent') == opp for opp in labels]
+    elif bar_stack == 'By Score':
+        score_bins = [0, 4, 8, 13, 17]
+        return [
+            (pl.col('Score') < score_bins[i+1]) & (pl.col('Score') >= score_bins[i]) if i < len(score_bins)-1 else pl.col('Score') >= score_bins[i]
+            for i in range(len(labels))
+        ]
+    elif bar_stack == 'By Date':
+        date_range = pd.date_range(start=start_date, end=end_date, freq='MS')
+        assert labels == [date.strftime('%Y-%m') for date in date_range]
+        return [
+            (pl.col('Start Date') >= date.date()) & (pl.col('Start Date') < (date + pd.DateOffset(months=1)).date())
+            for date in date_range
+        ]
+    elif bar_stack == 'By Singles or Teams':
+        return [pl.col('Type') == t for t in labels]
+
+@pytest.mark.parametrize('bar_stack', ['No Split', 'By Turn', 'By Opponent Faction', 'By Score', 'By Date', 'By Singles or Teams'])
+def test_split_counts_match_baseline(selection, bar_stack):
+    list_data, data_view, score_cube, score_totals, start_date, end_date, _ = selection
+    counts, labels, _, _ = split_counts(bar_stack, data_view, score_totals, score_cube, faction_keys, start_date, end_date)
+    conditions = baseline_conditions(bar_stack, list_data, labels, start_date, end_date)
+    np.testing.assert_array_equal(counts, baseline_counts(list_data, conditions))
+
+# The pairing percentages as the page first computed them, with a group_by and pivot of the team games
+
+def baseline_pairings(list_data):
+    team_games = list_data.filter(pl.col('Type') == 'Teams')
+    counts = team_games.group_by(['Opponent', 'Faction']).agg(pl.len().alias('num_games'))
+    counts_pivot = counts.pivot(on='Faction', index='Opponent', values='num_games').fill_null(0)
+    faction_totals = team_games.group_by('Faction').agg(pl.len().alias('All'))
+    All = faction_totals['All'].sum()
+    percent_table = counts_pivot.clone()
+    for col in percent_table.columns:
+        if col != 'Opponent':
+            total = faction_totals.filter(pl.col('Faction') == col)['All'][0]
+            percent_table = percent_table.with_columns((pl.col(col) / total * 100).alias(col))
+    all_row = faction_totals.with_columns((pl.col('All') / All * 100).round(1))
+    percent_table_pd = percent_table.to_pandas().set_index('Opponent')
+    all_row_pd = all_row.to_pandas().set_index('Faction').T
+    return pd.concat([all_row_pd, percent_table_pd]), All
+
+def test_pairing_percentages_match_baseline(selection):
+    list_data, data_view, *_, filter_key = selection
+    factions, opponents, percent_matrix, All = pairing_percentages(filter_key, data_view, faction_keys)
+    baseline, baseline_all = baseline_pairings(list_data)
+    assert All == baseline_all
+    assert sorted(factions) == sorted(baseline.columns.astype(str))
+    assert sorted(opponents) == sorted(baseline.index[1:].astype(str))
+    baseline.columns, baseline.index = baseline.columns.astype(str), baseline.index.astype(str)
+    np.testing.assert_allclose(percent_matrix, baseline.loc[['All', *opponents], factions].to_numpy(dtype=float))
@@ -0,0 +1,61 @@
+import polars as pl
+
+from filter_cache import FilterCache, result_size
+
+class Sized:
+    '''A stand in for a frame or view of a known estimated size.'''
+
+    def __init__(self, size):
+        self.size = size
+
+    def estimated_size(self):
+        return self.size
+
+def cache_values(cache, keys, size=100):
+    '''Get the keys from the cache, returning the keys that were computed.'''
+    computed = []
+    def compute(key):
+        computed.append(key)
+        return (Sized(size),)
+    for key in keys:
+        cache.get(key, lambda: compute(key))
+    return computed
+
+def test_evicts_least_recently_used_by_entries():
+    cache = FilterCache(max_entries=2)
+    assert cache_values(cache, ['a', 'b', 'a', 'c']) == ['a', 'b', 'c']
+    # b was used least recently, so it went to make room for c
+    assert list(cache.entries) == ['a', 'c']
+    assert cache_values(cache, ['a', 'b']) == ['b']
+    assert cache.stats()['evictions'] == 2
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = FilterCache(max_entries=16, max_bytes=250)
+    assert cache_values(cache, ['a', 'b', 'a', 'c']) == ['a', 'b', 'c']
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.size == 200
+
+    # A result larger than the whole cache is returned but not cached, and evicts nothing
+    result = cache.get('d', lambda: (Sized(300),))
+    assert result[0].size == 300
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.stats()['evictions'] == 1
+
+def test_stats_count_hits_and_misses():
+    cache = FilterCache()
+    cache_values(cache, ['a', 'b', 'a', 'a', 'c', 'b'])
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (3, 3, 0, 3)
+    assert stats['size_mb'] == 300 / 1024**2
+
+def test_clear_keeps_counts():
+    cache = FilterCache()
+    cache_values(cache, ['a', 'a', 'b'])
+    cache.clear()
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['size_mb']) == (1, 2, 0, 0)
+    assert cache_values(cache, ['a']) == ['a']
+
+def test_result_size_counts_frames():
+    frame = pl.DataFrame({'Score': list(range(100))})
+    assert result_size((frame, Sized(10), 5)) == frame.estimated_size() + 10
@@ -0,0 +1,256 @@
+import os
+import sys
+import shutil
+import textwrap
+from datetime import timedelta
+
+import pytest
+import polars as pl
+import numpy as np
+from polars.testing import assert_frame_equal
+from streamlit.testing.v1 import AppTest
+
+import load_and_organise_data
+from load_and_organise_data import (parse_folders, data_manifest, snapshot_frames, sum_score_cube, date_range_totals,
+                                    gather_lists, classify_options)
+from compact_data import compact_data_folder
+from conftest import repo_dir, tournament_folders, copy_tournaments, load, select_data, selections
+
+def new_ids():
+    return {'tournament': 0, 'game': 0, 'list': 0, 'unit': 0}
+
+def record_parsed_folders(monkeypatch):
+    '''Record the names of the folders that are parsed from now on.'''
+    parsed = []
+    def recording_parse_folders(data_dir, folders, next_ids, max_workers=None):
+        parsed.extend(folders)
+        return parse_folders(data_dir, folders, next_ids, max_workers)
+    monkeypatch.setattr(load_and_organise_data, 'parse_folders', recording_parse_folders)
+    return parsed
+
+def joined_rows(dataset):
+    '''The tournaments, games, lists, units and options of a dataset, each joined to the rows they belong to and sorted,
+    without the ids, which depend on the order the folders were parsed in.'''
+    ids = ['tournament_id', 'game_id', 'list_id', 'unit_id']
+    games = dataset.game_data.join(dataset.tournament_data, on='tournament_id', suffix=' of Tournament')
+    lists = dataset.list_data.join(games, on='game_id', suffix=' of Game')
+    tables = [
+        dataset.tournament_data,
+        games,
+        lists,
+        dataset.unit_data.join(lists, on='list_id', suffix=' of List'),
+        dataset.option_data.join(lists, on='list_id', suffix=' of List'),
+    ]
+    rows = []
+    for table in tables:
+        table = table.drop(column for column in table.columns if column in ids)
+        table = table.with_columns(
+            pl.col(column).cast(pl.String) for column, dtype in table.schema.items() if isinstance(dtype, (pl.Categorical, pl.Enum))
+        )
+        rows.append(table.sort(table.columns, nulls_last=True))
+    return rows
+
+# Parsing in a process pool
+
+def test_parse_folders_in_pool_matches_in_process(data_dir):
+    folders = data_manifest(data_dir)
+    pool_ids, process_ids = new_ids(), new_ids()
+    *pool_frames, pool_manifest = parse_folders(data_dir, folders, pool_ids, max_workers=2)
+    *process_frames, process_manifest = parse_folders(data_dir, folders, process_ids, max_workers=1)
+    for pool_frame, process_frame in zip(pool_frames, process_frames):
+        assert_frame_equal(pool_frame, process_frame)
+    assert pool_manifest == process_manifest
+    assert pool_ids == process_ids
+
+def test_parse_folders_in_app_reads_in_threads(data_dir, monkeypatch):
+    folders = data_manifest(data_dir)
+    *process_frames, process_manifest = parse_folders(data_dir, folders, new_ids(), max_workers=1)
+    monkeypatch.setattr(load_and_organise_data, 'get_script_run_ctx', lambda suppress_warning: object())
+    def no_pool(*args, **kwargs):
+        raise AssertionError('a process pool was started inside the app')
+    monkeypatch.setattr(load_and_organise_data, 'ProcessPoolExecutor', no_pool)
+    *thread_frames, thread_manifest = parse_folders(data_dir, folders, new_ids(), max_workers=2)
+    for thread_frame, process_frame in zip(thread_frames, process_frames):
+        assert_frame_equal(thread_frame, process_frame)
+    assert thread_manifest == process_manifest
+
+def test_parse_folders_runs_in_app(data_dir, monkeypatch):
+    # The app stands in for __main__ while it runs, and is left there afterwards
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+    # Spawned workers would import the script as __main__ and parse the folders again
+    script = textwrap.dedent(f'''
+        import sys
+        sys.path.insert(0, {repo_dir!r})
+        import streamlit as st
+        from load_and_organise_data import parse_folders, data_manifest
+        frames = parse_folders({str(data_dir)!r}, data_manifest({str(data_dir)!r}), {new_ids()!r})
+        st.write(frames[2].height)
+    ''')
+    app = AppTest.from_string(script, default_timeout=120).run()
+    assert not app.exception
+
+# Snapshots
+
+def test_snapshot_round_trip(data_dir, alias_dir, tmp_path, monkeypatch):
+    parsed = load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    assert sorted(os.listdir(tmp_path / 'snapshot')) == sorted([*(f'{name}.arrow' for name in snapshot_frames), 'metadata.json', 'aliases'])
+
+    # Loading again reads the snapshot without parsing anything
+    parsed_folders = record_parsed_folders(monkeypatch)
+    reloaded = load(data_dir, tmp_path / 'snapshot', alias_dir)
+    assert parsed_folders == []
+    assert reloaded.fingerprint == parsed.fingerprint
+    for name in snapshot_frames:
+        assert_frame_equal(getattr(reloaded, name), getattr(parsed, name))
+
+def test_snapshot_is_rebuilt_when_aliases_change(data_dir, alias_dir, tmp_path, monkeypatch):
+    parsed = load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    unit_aliases = pl.read_csv(alias_dir / 'unit_aliases.csv')
+    unit_aliases.head(unit_aliases.height - 1).write_csv(alias_dir / 'unit_aliases.csv')
+
+    parsed_folders = record_parsed_folders(monkeypatch)
+    rebuilt = load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    assert sorted(parsed_folders) == sorted(os.listdir(data_dir))
+    assert rebuilt.fingerprint != parsed.fingerprint
+
+def test_loading_leaves_the_alias_tables_alone(data_dir, alias_dir, tmp_path):
+    tables = {file_name: (alias_dir / file_name).read_bytes() for file_name in os.listdir(alias_dir)}
+    load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    assert {file_name: (alias_dir / file_name).read_bytes() for file_name in os.listdir(alias_dir)} == tables
+
+    # Without alias tables every name is new, and the names are kept with the snapshot
+    load(data_dir, tmp_path / 'new_snapshot', tmp_path / 'no_aliases', max_workers=1)
+    assert not (tmp_path / 'no_aliases').exists()
+    assert pl.read_csv(tmp_path / 'new_snapshot' / 'aliases' / 'unit_aliases.csv').height > 0
+
+# Incremental updates
+
+def add_folders(data_dir):
+    copy_tournaments(data_dir, tournament_folders[6:8])
+    return tournament_folders[6:8]
+
+def remove_folder(data_dir):
+    shutil.rmtree(data_dir / tournament_folders[2])
+    return []
+
+def touch_folder(data_dir):
+    folder_path = data_dir / tournament_folders[3]
+    file_path = folder_path / sorted(os.listdir(folder_path))[0]
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    return [tournament_folders[3]]
+
+@pytest.mark.parametrize('change', [add_folders, remove_folder, touch_folder])
+def test_incremental_update_matches_full_parse(data_dir, tmp_path, monkeypatch, change):
+    # Start from a snapshot without name corrections, so the update has names of its own to match
+    alias_dir = tmp_path / 'no_aliases'
+    load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    changed_folders = change(data_dir)
+    full = load(data_dir, tmp_path / 'full', alias_dir, incremental=False, max_workers=1)
+
+    parsed_folders = record_parsed_folders(monkeypatch)
+    updated = load(data_dir, tmp_path / 'snapshot', alias_dir, max_workers=1)
+    assert sorted(parsed_folders) == sorted(changed_folders)
+    assert updated.fingerprint == full.fingerprint
+    for updated_rows, full_rows in zip(joined_rows(updated), joined_rows(full)):
+        assert_frame_equal(updated_rows, full_rows)
+
+    # Loading again after the update reads the updated snapshot
+    parsed_folders.clear()
+    reloaded = load(data_dir, tmp_path / 'snapshot', alias_dir)
+    assert parsed_folders == []
+    for name in snapshot_frames:
+        assert_frame_equal(getattr(reloaded, name), getattr(updated, name))
+
+# Packed tournaments
+
+def test_changed_packed_folder_is_read_again(data_dir):
+    compact_data_folder(data_dir)
+    folder_name = tournament_folders[0]
+    assert folder_name not in data_manifest(data_dir)
+
+    folder_path = data_dir / folder_name
+    file_name = sorted(os.listdir(folder_path))[-1]
+    shutil.copy(folder_path / file_name, folder_path / f'zz_{file_name}')
+    assert folder_name in data_manifest(data_dir)
+    assert f'{folder_name}.ndjson.gz' not in data_manifest(data_dir)
+
+def test_remove_keeps_folders_with_files_not_packed(data_dir, capsys):
+    invalid_folder, other_folder = tournament_folders[:2]
+    (data_dir / invalid_folder / 'zz_invalid.json').write_text('{"not": "finished"')
+    (data_dir / other_folder / 'notes.txt').write_text('Not a report')
+    compact_data_folder(data_dir, remove=True)
+    assert sorted(os.listdir(data_dir)) == sorted(
+        [invalid_folder, other_folder] + [f'{folder_name}.ndjson.gz' for folder_name in tournament_folders[:6]]
+    )
+    assert str(data_dir / invalid_folder / 'zz_invalid.json') in capsys.readouterr().out
+
+# Score totals
+
+def assert_date_range_totals_match(dataset, raw_view, start_date, end_date):
+    _, _, score_cube, score_totals, *_ = select_data(dataset, raw_view, start_date, end_date, 'Any')
+    expected = sum_score_cube(score_cube)
+    keys = ['Faction', 'Opponent', 'Turn']
+    # The number of lists is counted as a UInt32 by the score cube
+    as_strings = [pl.col(key).cast(pl.String) for key in keys] + [pl.col('Lists').cast(pl.Int64)]
+    assert_frame_equal(
+        score_totals.with_columns(as_strings).sort(keys).select(expected.columns),
+        expected.with_columns(as_strings).sort(keys),
+    )
+
+@pytest.mark.parametrize('name', [name for name, (_, _, tournament_type) in selections.items() if tournament_type == 'Any'])
+def test_date_range_totals_match_summed_score_cube(dataset, raw_view, name):
+    start_date, end_date, _ = selections[name]
+    assert_date_range_totals_match(dataset, raw_view, start_date, end_date)
+
+def test_date_range_totals_leave_out_tournaments_ending_after_the_range(dataset, raw_view):
+    # Ranges that end during a tournament with games
+    tournaments = dataset.tournament_data.filter(
+        (pl.col('End Date') > pl.col('Start Date')) & pl.col('tournament_id').is_in(dataset.score_cube['tournament_id'].implode())
+    )
+    assert tournaments.height > 0
+    for start_date, end_date in tournaments.select('Start Date', 'End Date').head(5).iter_rows():
+        assert_date_range_totals_match(dataset, raw_view, start_date, end_date - timedelta(days=1))
+
+# Gathering the units and options of lists
+
+@pytest.mark.parametrize('table', ['unit', 'option'])
+@pytest.mark.parametrize('fraction', [0.01, 0.75])
+def test_gather_lists_matches_is_in(dataset, table, fraction):
+    child_data = getattr(dataset, f'{table}_data')
+    row_index = getattr(dataset, f'{table}_index')
+    rng = np.random.default_rng(0)
+    all_ids = dataset.list_data['list_id'].to_numpy()
+    list_ids = np.sort(rng.choice(all_ids, size=int(len(all_ids) * fraction), replace=False))
+    list_lengths = np.bincount(child_data['list_id'].to_numpy(), minlength=all_ids.max() + 1)
+    expected = child_data.filter(pl.col('list_id').is_in(pl.Series(list_ids).implode()))
+    for index in (row_index, None):
+        rows, lengths = gather_lists(child_data, list_ids, index)
+        assert_frame_equal(rows, expected)
+        assert lengths.tolist() == list_lengths[list_ids].tolist()
+
+    # Unsorted lists are gathered list by list in their order
+    list_ids = rng.permutation(list_ids)
+    rows, lengths = gather_lists(child_data, list_ids, row_index)
+    assert_frame_equal(rows, pl.DataFrame({'list_id': list_ids}).join(child_data, on='list_id', maintain_order='left').select(child_data.columns))
+    assert lengths.tolist() == list_lengths[list_ids].tolist()
+
+# Option classes
+
+def test_classify_options_matches_option_types(dataset):
+    option_data = dataset.option_data
+    # The conditions the pages first filtered the options with
+    option_type = pl.col('Option Type').cast(pl.String).str.to_lowercase()
+    magic_cond = pl.col('Option Name').is_not_null() & pl.any_horizontal(option_type.str.contains(substring) for substring in [
+        'magic items', 'favour', 'gifts of the dark gods', 'blood power', 'manifestations', 'honour', 'battle runes',
+        'big names', 'big name', 'heroic traits', 'aspect of nature', 'howdah', 'totems',
+    ])
+    masks = option_data.select(
+        (magic_cond == (pl.col('Option Name').is_not_null() & (pl.col('Option Class') == 'Faction Item'))).all().alias('Faction Item'),
+        ((pl.col('Option Type') == 'Path') == (pl.col('Option Class') == 'Path')).all().alias('Path'),
+        ((pl.col('Option Type') == 'Model Count') == (pl.col('Option Class') == 'Model Count')).all().alias('Model Count'),
+    )
+    assert masks.row(0, named=True) == {'Faction Item': True, 'Path': True, 'Model Count': True}
+
+    # Classifying again gives the same classes
+    assert_frame_equal(classify_options(option_data.drop('Option Class')), option_data)
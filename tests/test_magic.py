@@ -0,0 +1,52 @@
+import polars as pl
+import numpy as np
+import scipy.stats as stats
+import pytest
+
+from helper_functions import option_score_stats
+from magic import path_score_stats
+from constants import faction_keys
+
+# The score statistics of the magic paths as the magic page first computed them, filtering the lists of every path
+
+def baseline_path_stats(list_data, option_data, factions):
+    flist_data = list_data.filter(pl.col('Faction').is_in(factions))
+    path_option_data = option_data.filter((pl.col('Option Type') == 'Path') & (pl.col('list_id').is_in(flist_data['list_id'].implode())))
+    path_stats = {}
+    for path in path_option_data['Option Name'].unique().to_list():
+        spell_list_ids = path_option_data.filter(pl.col('Option Name') == path).select('list_id').unique().to_series().implode()
+        path_stats[path] = flist_data.filter(pl.col('list_id').is_in(spell_list_ids))['Score'].to_numpy()
+    magic_scores = flist_data.filter(pl.col('list_id').is_in(path_option_data['list_id'].unique().implode()))['Score'].to_numpy()
+    return path_stats, magic_scores
+
+def selected_paths(selection):
+    list_data, data_view, *_, filter_key = selection
+    path_data = data_view.options('list_id', 'Option Name', 'Option Type', 'Option Class').filter(pl.col('Option Class') == 'Path')
+    return list_data, path_data, filter_key
+
+def test_option_score_stats_match_baseline(selection):
+    list_data, path_data, _ = selected_paths(selection)
+    baseline, _ = baseline_path_stats(list_data, path_data, faction_keys)
+    path_stats = option_score_stats(list_data, path_data)
+    assert sorted(path_stats['Option Name'].cast(pl.String).to_list()) == sorted(baseline)
+    for path, num_lists, mean, variance in path_stats.iter_rows():
+        scores = baseline[path]
+        assert num_lists == len(scores)
+        assert mean == pytest.approx(np.mean(scores))
+        if num_lists > 1:
+            assert (variance / num_lists) ** 0.5 == pytest.approx(stats.sem(scores))
+
+@pytest.mark.parametrize('factions', [faction_keys, faction_keys[:4]], ids=['every faction', 'some factions'])
+def test_path_score_stats_match_baseline(selection, factions):
+    list_data, path_data, filter_key = selected_paths(selection)
+    baseline, magic_scores = baseline_path_stats(list_data, path_data, factions)
+    path_stats, (num_games, mean, variance) = path_score_stats(filter_key, factions, list_data, path_data)
+    assert sorted(path_stats) == sorted(baseline)
+    for path, (num_lists, path_mean) in path_stats.items():
+        assert num_lists == len(baseline[path])
+        assert path_mean == pytest.approx(np.mean(baseline[path]))
+    assert num_games == len(magic_scores)
+    if num_games:
+        assert mean == pytest.approx(np.mean(magic_scores))
+    if num_games > 1:
+        assert (variance / num_games) ** 0.5 == pytest.approx(stats.sem(magic_scores))
@@ -0,0 +1,88 @@
+import polars as pl
+import pytest
+import Levenshtein
+from collections import Counter, defaultdict
+
+from load_and_organise_data import parse_folders, data_manifest
+from name_correction import find_name_corrections, correct_unit_names, correct_option_names, unit_alias_schema, option_alias_schema
+from conftest import tournament_folders, copy_tournaments
+
+# The name corrections as the loader first made them, comparing every pair of names of a faction or unit
+
+def reference_corrections(names):
+    name_counts = Counter(names)
+    unique_names = list(name_counts.keys())
+    corrections = {}
+    for i, name1 in enumerate(unique_names):
+        for name2 in unique_names[i+1:]:
+            if Levenshtein.distance(name1, name2) == 1:
+                popular = name1 if name_counts[name1] >= name_counts[name2] else name2
+                less_popular = name2 if popular == name1 else name1
+                corrections[less_popular] = popular
+    return corrections
+
+def reference_unit_names(unit_rows, list_rows):
+    list_id_to_faction = {row['list_id']: row['Faction'] for row in list_rows}
+    faction_units = defaultdict(list)
+    for row in unit_rows:
+        faction = list_id_to_faction.get(row['list_id'])
+        if faction:
+            faction_units[faction].append(row['Name'])
+    name_corrections = {
+        (faction, less_popular): popular
+        for faction, names in faction_units.items()
+        for less_popular, popular in reference_corrections(names).items()
+    }
+    for row in unit_rows:
+        key = (list_id_to_faction.get(row['list_id']), row['Name'])
+        if key in name_corrections:
+            row['Name'] = name_corrections[key]
+    return unit_rows
+
+def reference_option_names(option_rows):
+    unit_options = defaultdict(list)
+    for row in option_rows:
+        unit_options[row['Unit Name']].append(row['Option Name'])
+    option_corrections = {
+        (unit_name, less_popular): popular
+        for unit_name, options in unit_options.items()
+        for less_popular, popular in reference_corrections(options).items()
+    }
+    for row in option_rows:
+        key = (row['Unit Name'], row['Option Name'])
+        if key in option_corrections:
+            corrected_name = option_corrections[key]
+            types = [r['Option Type'] for r in option_rows if r['Unit Name'] == row['Unit Name'] and r['Option Name'] == corrected_name]
+            if types:
+                row['Option Name'] = corrected_name
+                row['Option Type'] = Counter(types).most_common(1)[0][0]
+    return option_rows
+
+@pytest.fixture(scope='module', params=[0, 42, 246])
+def raw_frames(request, tmp_path_factory):
+    '''The uncorrected frames of a few tournaments, each with misspelt unit and option names.'''
+    data_dir = tmp_path_factory.mktemp('data')
+    copy_tournaments(data_dir, tournament_folders[request.param:request.param + 6])
+    ids = {'tournament': 0, 'game': 0, 'list': 0, 'unit': 0}
+    *frames, _ = parse_folders(str(data_dir), data_manifest(str(data_dir)), ids, max_workers=1)
+    return frames
+
+def test_find_name_corrections_matches_pairwise():
+    names = ['Spearmen', 'Spearman', 'Spearmen', 'Spearmn', 'Archers', 'Archer', 'Archers', 'Knights', 'Knight', 'Knigth']
+    unique_names = list(Counter(names))
+    assert find_name_corrections(unique_names, list(Counter(names).values())) == reference_corrections(names)
+
+def test_correct_unit_names_matches_pairwise(raw_frames):
+    _, _, list_data, unit_data, _ = raw_frames
+    corrected, aliases = correct_unit_names(unit_data, list_data, pl.DataFrame(schema=unit_alias_schema))
+    expected = reference_unit_names(unit_data.select('list_id', 'Name').to_dicts(), list_data.select('list_id', 'Faction').to_dicts())
+    assert corrected['Name'].cast(pl.String).to_list() == [row['Name'] for row in expected]
+    assert aliases.filter(pl.col('Raw Name') != pl.col('Name')).height > 0
+
+def test_correct_option_names_matches_pairwise(raw_frames):
+    *_, option_data = raw_frames
+    corrected, aliases = correct_option_names(option_data, pl.DataFrame(schema=option_alias_schema))
+    expected = reference_option_names(option_data.select('Unit Name', 'Option Name', 'Option Type').to_dicts())
+    assert corrected['Option Name'].cast(pl.String).to_list() == [row['Option Name'] for row in expected]
+    assert corrected['Option Type'].cast(pl.String).to_list() == [row['Option Type'] for row in expected]
+    assert aliases.filter(pl.col('Raw Option Name') != pl.col('Option Name')).height > 0
@@ -0,0 +1,121 @@
+import polars as pl
+import pandas as pd
+import numpy as np
+import pytest
+import scipy.stats as stats
+
+from helper_functions import colourmap, round_sig
+from scores_performance import matchup_table_df, score_counts, score_turns, scores, bootstrap_means, faction_error_bars
+from constants import faction_keys
+
+# The matchup table as the scores page first built it, filtering the lists for every entry
+
+def baseline_cell(scores):
+    if len(scores) == 0:
+        return ''
+    mean = np.mean(scores)
+    sem = stats.sem(scores) if len(scores) > 1 else 0
+    if sem < 1e-6:
+        return f'{int(mean)}'
+    mean, sem = round_sig(mean, sem)
+    return f'{mean}±{sem}'
+
+def baseline_colour(val):
+    if val in ('', '-'): return ''
+    try:
+        mean, sem = val.split('±')
+        mean = float(mean)
+        sem = float(sem)
+        z_score = (mean - 10) / sem if sem else 0
+        return f'color: {colourmap(z_score)}'
+    except:
+        return ''
+
+def baseline_matchup_table(list_data, factions):
+    first_data = list_data.filter(pl.col('Turn') == 'First')
+    second_data = list_data.filter(pl.col('Turn') == 'Second')
+    rows = [
+        [baseline_cell(list_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+        [baseline_cell(first_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+        [baseline_cell(second_data.filter(pl.col('Faction') == fac)['Score'].to_list()) for fac in factions],
+    ]
+    for opp in factions:
+        rows.append([
+            '-' if fac == opp else baseline_cell(list_data.filter((pl.col('Faction') == fac) & (pl.col('Opponent') == opp))['Score'].to_list())
+            for fac in factions
+        ])
+    return pd.DataFrame(rows, columns=factions, index=['All', 'First', 'Second', *factions]).style.map(baseline_colour)
+
+def test_matchup_table_matches_baseline(selection):
+    list_data, data_view, *_ = selection
+    matchup_df, matchup_styles = matchup_table_df(data_view.lists('Faction', 'Opponent', 'Turn', 'Score'), faction_keys)
+    styler = matchup_df.style.apply(lambda _: matchup_styles, axis=None)
+    baseline = baseline_matchup_table(list_data, faction_keys)
+    pd.testing.assert_frame_equal(matchup_df, baseline.data)
+    assert styler.set_uuid('matchup').to_html() == baseline.set_uuid('matchup').to_html()
+    assert styler.ctx == baseline.ctx
+
+def test_matchup_table_rounds_like_scipy():
+    # scipy gives a standard error of 1.4999999999999998 for these scores, which rounds down
+    list_data = pl.DataFrame({
+        'Faction': ['BH', 'BH', 'DE', 'DE'],
+        'Opponent': ['DE', 'DE', 'BH', 'BH'],
+        'Turn': ['First', 'Second', 'Second', 'First'],
+        'Score': [7, 10, 13, 10],
+    })
+    matchup_df, _ = matchup_table_df(list_data, ['BH', 'DE'])
+    assert matchup_df.loc['All', 'BH'] == baseline_cell([7, 10]) == '8±1'
+    assert matchup_df.loc['DE', 'BH'] == '8±1'
+    assert matchup_df.loc['BH', 'BH'] == '-'
+    assert matchup_df.loc['First', 'DE'] == '10'
+
+# The score distribution as the scores page first counted it, filtering the lists for every score
+
+def test_score_counts_match_baseline(selection):
+    list_data, data_view, *_, filter_key = selection
+    counts = score_counts(filter_key, data_view, faction_keys)
+    selected_factions = faction_keys[::3]
+    for turn_index, turn in enumerate(score_turns):
+        turn_data = list_data.filter(pl.col('Turn') == turn)
+        every_faction = [turn_data.filter(pl.col('Score') == i).height for i in scores]
+        some_factions = [turn_data.filter((pl.col('Score') == i) & (pl.col('Faction').is_in(selected_factions))).height for i in scores]
+        assert counts.sum(axis=(0, 2))[turn_index, :len(scores)].tolist() == every_faction
+        assert counts[[faction_keys.index(fac) for fac in selected_factions]].sum(axis=(0, 2))[turn_index, :len(scores)].tolist() == some_factions
+
+# The error bars of the faction scores, against the scores of each faction's lists outside mirror matchups
+
+def test_bootstrap_means_match_resampling_the_lists():
+    rng = np.random.default_rng(1)
+    samples = [rng.integers(0, 21, size=n) for n in (2, 15, 60, 200)]
+    histograms = np.array([np.bincount(sample, minlength=len(scores)) for sample in samples] + [np.zeros(len(scores), dtype=np.int64)])
+    means = bootstrap_means.__wrapped__(histograms, num_resamples=20000, seed=0)
+    np.testing.assert_array_equal(means, bootstrap_means.__wrapped__(histograms, num_resamples=20000, seed=0))
+    assert np.isnan(means[-1]).all()
+    for sample, sample_means in zip(samples, means):
+        resampled = rng.choice(sample, size=(20000, len(sample))).mean(axis=1)
+        bootstrap_error = sample.std() / len(sample) ** 0.5
+        assert sample_means.mean() == pytest.approx(sample.mean(), abs=0.05 * bootstrap_error)
+        assert sample_means.std() == pytest.approx(bootstrap_error, rel=0.05)
+        np.testing.assert_allclose(np.percentile(sample_means, [2.5, 50, 97.5]), np.percentile(resampled, [2.5, 50, 97.5]),
+                                   atol=0.1 * bootstrap_error)
+
+def test_faction_error_bars_match_scipy(selection):
+    list_data, data_view, _, score_totals, *_, filter_key = selection
+    counts = score_counts(filter_key, data_view, faction_keys)
+    mean, error = faction_error_bars(counts, score_totals, faction_keys, 90.0)
+    bootstrap_mean, (lower, upper) = faction_error_bars(counts, score_totals, faction_keys, 90.0, bootstrap=True)
+    faction_scores = [list_data.filter((pl.col('Faction') == fac) & (pl.col('Opponent') != fac))['Score'].to_numpy() for fac in faction_keys]
+    means = bootstrap_means(np.array([np.bincount(fac_scores, minlength=len(scores)) for fac_scores in faction_scores]).reshape(-1, len(scores)))
+    np.testing.assert_array_equal(bootstrap_mean, mean)
+    np.testing.assert_allclose(mean - lower, np.percentile(means, 5, axis=1))
+    np.testing.assert_allclose(mean + upper, np.percentile(means, 95, axis=1))
+    for k, fac_scores in enumerate(faction_scores):
+        if len(fac_scores) == 0:
+            assert np.isnan(mean[k])
+            continue
+        assert mean[k] == pytest.approx(np.mean(fac_scores))
+        if len(fac_scores) == 1:
+            assert np.isnan(error[k])
+            continue
+        _, high = stats.t.interval(0.9, len(fac_scores) - 1, loc=np.mean(fac_scores), scale=stats.sem(fac_scores))
+        assert mean[k] + error[k] == pytest.approx(high)